@@ -0,0 +1,169 @@
+# --- 🌐 JSON API ---
+# LINE bot や店頭端末など、Streamlit のセッションを張らずに診断したい呼び出し元向け。
+#   python api.py [--host 0.0.0.0] [--port 8080]
+#
+# POST /analyze
+#   {"name": "Guest",
+#    "birth": {"year": 1990, "month": 1, "day": 1, "hour": 12, "minute": 0},
+#    "place": "131041",        （市区町村の団体コード。都道府県名でもよい。旧形式の "prefecture" も可）
+#    "scent_ranks": {"scent_a": 1, "scent_b": 2, ..., "scent_h": 8}}
+# GET /places?q=しんじゅく&limit=10   出生地の入力補完（名前・よみがなの前方一致）
+# GET /places/nearest?lat=35.69&lon=139.70
+# GET /healthz
+# GET /metrics   （Prometheus のテキスト形式）
+import argparse
+import asyncio
+import json
+from functools import lru_cache, partial
+
+from aiohttp import web
+
+import metrics
+from content import ELEMENT_JP, OIL_NAMES, PREFECTURES, SCENTS_CONF, SIGN_JP
+from ephemeris import ensure_ephemeris
+from gazetteer import load_gazetteer
+from natal_cache import NatalCache
+from metrics import span
+from report import build_report_texts
+from scoring import BIRTH_FIELDS, analyze, validate_birth, validate_scent_ranks
+
+json_dumps = partial(json.dumps, ensure_ascii=False)
+
+
+@lru_cache(maxsize=None)
+def report_texts(core, like, dislike):
+    # 組み合わせは 4 x 4 x 4 通りしかないので全部覚えておく
+    return build_report_texts(core, like, dislike)
+
+
+def parse_integer(value, field):
+    # 1990.7 のような小数を int() で切り捨てない。数字だけの文字列は CSV と同じく受け付ける
+    if isinstance(value, str) and value.isdigit():
+        return int(value)
+    if isinstance(value, bool) or not isinstance(value, int):
+        raise ValueError(f"{field} must be an integer")
+    return value
+
+
+def parse_request(body):
+    name = body.get("name", "Guest")
+    if not isinstance(name, str):
+        raise ValueError("name must be a string")
+    birth = tuple(parse_integer(body["birth"][field], field) for field in BIRTH_FIELDS)
+    # 範囲・存在しない日付の確認はグループ・一括処理と同じもの
+    validate_birth(birth)
+    place = str(body["place"]) if "place" in body else body["prefecture"]
+    if place not in PREFECTURES and load_gazetteer().find(place) is None:
+        raise ValueError(f"unknown birthplace: {place}")
+    scent_ranks = {
+        scent["key"]: parse_integer(body["scent_ranks"][scent["key"]], scent["key"]) for scent in SCENTS_CONF
+    }
+    validate_scent_ranks(scent_ranks)
+    return name, birth + (place,), scent_ranks
+
+
+def build_response(name, analysis):
+    core, like, dislike = analysis["core"], analysis["like"], analysis["dislike"]
+    return {
+        "name": name,
+        "signs": analysis["signs"],
+        "signs_jp": {point: SIGN_JP[sign] for point, sign in analysis["signs"].items()},
+        "astro_scores": analysis["astro_scores"],
+        "scent_scores": analysis["scent_scores"],
+        "core": core,
+        "like": like,
+        "dislike": dislike,
+        "elements_jp": {"core": ELEMENT_JP[core], "like": ELEMENT_JP[like], "dislike": ELEMENT_JP[dislike]},
+        "oils": {"like": OIL_NAMES[like], "dislike": OIL_NAMES[dislike]},
+        "report": report_texts(core, like, dislike),
+    }
+
+
+def error_response(message, status=400):
+    return web.json_response({"error": message}, status=status, dumps=json_dumps)
+
+
+async def handle_analyze(request):
+    try:
+        body = await request.json()
+    except ValueError:
+        return error_response("request body must be JSON")
+    try:
+        name, birth, scent_ranks = parse_request(body)
+        # 1件あたり数十マイクロ秒なので、スレッドに逃がさずイベントループ上で計算する
+        with span("api_analyze"):
+            analysis = analyze(birth, scent_ranks, natal_cache=request.app["natal_cache"])
+    except (KeyError, TypeError) as e:
+        return error_response(f"missing or invalid field: {e}")
+    except ValueError as e:
+        return error_response(str(e))
+    return web.json_response(build_response(name, analysis), dumps=json_dumps)
+
+
+async def handle_places(request):
+    try:
+        limit = max(1, min(int(request.query.get("limit", "10")), 50))
+    except ValueError:
+        return error_response("limit must be an integer")
+    places = load_gazetteer().search(request.query.get("q", ""), limit=limit)
+    return web.json_response({"places": places}, dumps=json_dumps)
+
+
+async def handle_nearest(request):
+    try:
+        lat, lon = float(request.query["lat"]), float(request.query["lon"])
+    except (KeyError, ValueError):
+        return error_response("lat and lon are required")
+    try:
+        place = load_gazetteer().nearest(lat, lon)
+    except ValueError as e:
+        return error_response(str(e))
+    if place is None:
+        return error_response("no birthplace near the given coordinates", status=404)
+    return web.json_response({"place": place}, dumps=json_dumps)
+
+
+async def handle_healthz(request):
+    return web.json_response({"status": "ok"})
+
+
+async def handle_metrics(request):
+    return web.Response(text=metrics.prometheus_text(), content_type="text/plain", charset="utf-8")
+
+
+def _provision():
+    with span("ephemeris"):
+        ensure_ephemeris()
+    load_gazetteer()
+
+
+async def on_startup(app):
+    # 天体暦の準備はダウンロードを伴うことがあるので、イベントループの外で行う
+    await asyncio.get_running_loop().run_in_executor(None, _provision)
+
+
+def create_app(natal_cache=None):
+    app = web.Application()
+    app["natal_cache"] = natal_cache if natal_cache is not None else NatalCache.from_env()
+    natal_cache = app["natal_cache"]
+    metrics.register_collector(lambda: {f"aroma_natal_cache_{k}": v for k, v in natal_cache.stats().items()})
+    app.on_startup.append(on_startup)
+    app.router.add_post("/analyze", handle_analyze)
+    app.router.add_get("/places", handle_places)
+    app.router.add_get("/places/nearest", handle_nearest)
+    app.router.add_get("/healthz", handle_healthz)
+    app.router.add_get("/metrics", handle_metrics)
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Aroma Soul Navigation JSON API")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8080)
+    args = parser.parse_args()
+    metrics.setup_logging()
+    web.run_app(create_app(), host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
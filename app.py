@@ -1,277 +1,544 @@
 import streamlit as st
-import pandas as pd
-import plotly.graph_objects as go
-from plotly.subplots import make_subplots
-from flatlib.datetime import Datetime
-from flatlib.geopos import GeoPos
-from flatlib.chart import Chart
-from flatlib import const
-import swisseph as swe
+import logging
 import os
-import requests
+import threading
+import time
+from datetime import datetime, timedelta
+import metrics
+from content import BIG3_EXPLANATION, ELEMENT_JP, ELEMENT_KEYS, PRINT_CSS, SCENTS_CONF, SIGN_JP
+from gazetteer import load_gazetteer
+from metrics import span
+from report import INTRO_TEXT, INTRO_TITLE, SECTION_TITLES, SIGNATURE, build_report_texts
+
+# 入力画面の表示には plotly・swisseph・reportlab などは要らないので、
+# それぞれ使う関数の中で import する（最初の表示のあと、裏のスレッドで先に読み込んでおく）
 
 # --- 🌟 関数定義 ---
-def get_element(sign_name):
-    ELEMENTS = {
-        "Fire": ["Aries", "Leo", "Sagittarius"],
-        "Earth": ["Taurus", "Virgo", "Capricorn"],
-        "Air": ["Gemini", "Libra", "Aquarius"],
-        "Water": ["Cancer", "Scorpio", "Pisces"]
-    }
-    for element, signs in ELEMENTS.items():
-        if sign_name in signs: return element
-    return None
-
+@st.cache_resource(show_spinner="System initializing...")
 def download_ephemeris():
-    files = {
-        "sepl_18.se1": "https://raw.githubusercontent.com/aloistr/swisseph/master/ephe/sepl_18.se1",
-        "semo_18.se1": "https://raw.githubusercontent.com/aloistr/swisseph/master/ephe/semo_18.se1",
-        "seas_18.se1": "https://raw.githubusercontent.com/aloistr/swisseph/master/ephe/seas_18.se1"
-    }
-    for filename, url in files.items():
-        if not os.path.exists(filename):
+    # プロセスごとに1回だけ。失敗時はキャッシュされず、次の再実行でやり直す
+    from ephemeris import ensure_ephemeris
+
+    with span("ephemeris"):
+        return ensure_ephemeris()
+
+def _warmup():
+    # 重いモジュールの import と天体暦の準備を先に済ませる。失敗しても最初の分析のときにやり直す
+    try:
+        with span("warmup"):
+            import report_pdf  # noqa: F401
+            import scoring  # noqa: F401
+            from charts import build_pie_figure
+            from ephemeris import ensure_ephemeris
+
+            ensure_ephemeris()
+            build_pie_figure([1, 1, 1, 1], [1, 1, 1, 1])
+            get_chart_service()
+    except Exception:
+        logging.getLogger("aroma.app").exception("warmup failed")
+
+@st.cache_resource
+def start_warmup():
+    # AROMA_WARMUP=0 なら裏での読み込みはせず、最初の分析のときに読み込む
+    if os.environ.get("AROMA_WARMUP", "1") == "0":
+        return None
+    thread = threading.Thread(target=_warmup, name="warmup", daemon=True)
+    thread.start()
+    return thread
+
+@st.cache_resource
+def setup_metrics():
+    # ログ出力と（指定があれば）Prometheus 用の /metrics を1回だけ準備する
+    metrics.setup_logging()
+    port = os.environ.get("AROMA_METRICS_PORT")
+    if port:
+        metrics.start_http_server(int(port), os.environ.get("AROMA_METRICS_HOST", "127.0.0.1"))
+    return True
+
+@st.cache_resource
+def get_natal_cache():
+    # プロセス全体で1つだけ作る
+    from natal_cache import NatalCache
+
+    natal_cache = NatalCache.from_env()
+    metrics.register_collector(lambda: {
+        f"aroma_natal_cache_{k}": v for k, v in natal_cache.stats().items()
+    })
+    return natal_cache
+
+@st.cache_resource(show_spinner=False)
+def get_chart_service():
+    # 星の計算用のワーカープロセス（プロセス全体で1つ）。作った時点でワーカーを起動しておく
+    from chart_service import ChartService
+
+    chart_service = ChartService.from_env(download_ephemeris(), natal_cache=get_natal_cache())
+    chart_service.start()
+    metrics.register_collector(lambda: {
+        f"aroma_chart_service_{k}": v for k, v in chart_service.stats().items()
+    })
+    return chart_service
+
+def render_busy(error):
+    # 混雑・時間切れのときは、入力を残したままもう一度試してもらう
+    from chart_service import ChartServiceBusy
+
+    if isinstance(error, ChartServiceBusy):
+        st.warning("⏳ ただいま混み合っています。少し待ってから「もう一度試す」を押してください。")
+    else:
+        st.warning("⏳ 星の計算に時間がかかっています。少し待ってから「もう一度試す」を押してください。")
+    st.button("🔄 もう一度試す")
+
+@st.cache_resource
+def get_history():
+    # 分析履歴（AROMA_HISTORY_DB="" なら保存しない）
+    from history import HistoryStore
+    from natal_cache import NatalCache
+
+    return HistoryStore.from_env(natal_version=NatalCache.VERSION)
+
+@st.cache_resource
+def get_pdf_renderer():
+    from report_pdf import PdfRenderer
+
+    return PdfRenderer(max_workers=int(os.environ.get("AROMA_PDF_WORKERS", "2")))
+
+@st.cache_resource
+def get_figure_cache():
+    from charts import FigureCache
+
+    figure_cache = FigureCache(maxsize=int(os.environ.get("AROMA_FIGURE_CACHE_SIZE", "256")))
+    metrics.register_collector(lambda: {
+        f"aroma_figure_cache_{k}": v for k, v in figure_cache.stats().items()
+    })
+    return figure_cache
+
+# --- 📄 レポート表示 ---
+# セクションごとに fragment にして、再実行の範囲をセクション内に閉じ込める
+def score_table(astro_scores, scent_scores):
+    # 4行だけなので pandas を使わず Markdown の表にする
+    rows = ["| 性質 | 星 | 香り(順位計) |", "|:---|---:|---:|"]
+    rows += [f"| {ELEMENT_JP[e]} | {astro_scores[e]} | {scent_scores[e]} |" for e in ELEMENT_KEYS]
+    return "\n".join(rows)
+
+@st.fragment
+def render_big3(signs):
+    # --- Big 3 ---
+    with span("big3"), st.container(border=True):
+        c1, c2, c3 = st.columns(3)
+        with c1:
+            st.markdown(f"**☀️ 太陽 (本質)**")
+            st.write(f"### {SIGN_JP[signs['Sun']]}")
+            st.caption(BIG3_EXPLANATION['Sun'])
+        with c2:
+            st.markdown(f"**🌙 月 (内面)**")
+            st.write(f"### {SIGN_JP[signs['Moon']]}")
+            st.caption(BIG3_EXPLANATION['Moon'])
+        with c3:
+            st.markdown(f"**🏹 ASC (外見)**")
+            st.write(f"### {SIGN_JP[signs['Asc']]}")
+            st.caption(BIG3_EXPLANATION['Asc'])
+
+    st.write("") 
+
+@st.fragment
+def render_scores(astro_scores, scent_scores):
+    # --- グラフとスコア ---
+    col_g1, col_g2 = st.columns([1, 1.2])
+    
+    with col_g1:
+        st.markdown("**スコア内訳**")
+        with span("table"):
+            st.markdown(score_table(astro_scores, scent_scores))
+        st.caption("※香り順位計：数字が小さいほど「好き」、大きいほど「苦手」")
+
+    with col_g2:
+        astro_values = [astro_scores[k] for k in ELEMENT_KEYS]
+        scent_values = [scent_scores[k] for k in ELEMENT_KEYS]
+
+        # 軽量表示は plotly.js を読み込まない静的な SVG（印刷・低速端末向け）
+        static_chart = st.toggle("シンプル表示（印刷・低速端末向け）", key="static_chart")
+        with span("figure"):
+            if static_chart:
+                from charts import pie_svg
+
+                st.markdown(pie_svg(astro_values, scent_values, width="100%"), unsafe_allow_html=True)
+            else:
+                fig = get_figure_cache().get(astro_values, scent_values)["figure"]
+                st.plotly_chart(fig, use_container_width=True)
+
+# --- 🌌 星の流れ ---
+# 空の計算は全員で共通なので、timeline モジュールの中でプロセス全体にキャッシュされる
+TIMELINE_STEPS = {"1日ごと": 24, "1時間ごと": 1}
+# 計算中のグラフの描き直しは、この秒数に1回まで（キャッシュ済みなら途中では描かず、最後に1回だけ）
+TIMELINE_REDRAW_SECONDS = 0.5
+
+@st.cache_resource
+def get_timeline():
+    import timeline
+
+    metrics.register_collector(lambda: {
+        f"aroma_timeline_cache_{k}": v for k, v in timeline.cache_stats().items()
+    })
+    return timeline
+
+@st.fragment
+def render_timeline(astro_scores):
+    import numpy as np
+    from charts import build_timeline_figure
+    from scoring import JAPAN_TZ
+
+    timeline = get_timeline()
+    with st.expander("🌌 星の流れ（トランジット）"):
+        today = datetime.now(JAPAN_TZ).date()
+        with st.form("timeline_form", border=False):
+            col_range, col_step = st.columns([2, 1])
+            period = col_range.date_input("期間", (today, today + timedelta(days=30)))
+            step_label = col_step.radio("間隔", list(TIMELINE_STEPS), horizontal=True)
+            shown = st.form_submit_button("表示する")
+        if shown:
+            if len(period) != 2:
+                st.warning("期間の開始日と終了日を選んでください。")
+                return
+            st.session_state["timeline_request"] = (period[0], period[1], TIMELINE_STEPS[step_label])
+        # 一度表示した期間は、その後の再実行でも（キャッシュから）表示し続ける
+        request = st.session_state.get("timeline_request")
+        if request is None:
+            return
+        first_day, last_day, step_hours = request
+        start = datetime.combine(first_day, datetime.min.time(), JAPAN_TZ)
+        end = datetime.combine(last_day, datetime.min.time(), JAPAN_TZ) + timedelta(hours=24 - step_hours)
+        try:
+            total = timeline.count_points(start, end, step_hours)
+        except ValueError:
+            st.warning(f"期間が長すぎます（{timeline.MAX_POINTS:,}点まで）。期間を短くするか、間隔を「1日ごと」にしてください。")
+            return
+
+        # 同じ期間のグラフを描き終えていれば、その後の再実行ではそれをそのまま使う
+        astro_values = [astro_scores[k] for k in ELEMENT_KEYS]
+        figure_key = (request, tuple(astro_values))
+        chart = st.empty()
+        cached = st.session_state.get("timeline_figure")
+        if cached is not None and cached[0] == figure_key:
+            chart.plotly_chart(cached[1], use_container_width=True)
+            return
+
+        # 時間がかかるときだけ、計算できた分を途中で描く
+        progress = st.progress(0.0)
+        times, chunks = [], []
+        done = 0
+        with span("timeline"):
+            drawn = time.perf_counter()
+            for chunk_times, chunk_scores in timeline.timeline_chunks(start, end, step_hours):
+                times.append(chunk_times)
+                chunks.append(chunk_scores)
+                done += len(chunk_times)
+                if done < total and time.perf_counter() - drawn >= TIMELINE_REDRAW_SECONDS:
+                    chart.plotly_chart(build_timeline_figure(astro_values, np.concatenate(times), np.concatenate(chunks)),
+                                       use_container_width=True)
+                    drawn = time.perf_counter()
+                progress.progress(done / total)
+            fig = build_timeline_figure(astro_values, np.concatenate(times), np.concatenate(chunks))
+            chart.plotly_chart(fig, use_container_width=True)
+        progress.empty()
+        st.session_state["timeline_figure"] = (figure_key, fig)
+
+@st.cache_data(max_entries=64)
+def report_texts(core_star_elem, like_scent_elem, dislike_scent_elem):
+    return build_report_texts(core_star_elem, like_scent_elem, dislike_scent_elem)
+
+@st.fragment
+def render_report(core_star_elem, like_scent_elem, dislike_scent_elem):
+    with span("report"):
+        _render_report(core_star_elem, like_scent_elem, dislike_scent_elem)
+
+def _render_report(core_star_elem, like_scent_elem, dislike_scent_elem):
+    texts = report_texts(core_star_elem, like_scent_elem, dislike_scent_elem)
+
+    # --- 診断レポート ---
+    st.markdown("---")
+    
+    st.markdown(SECTION_TITLES["summary"])
+    st.info(texts["summary"])
+
+    st.markdown(SECTION_TITLES["star"])
+    st.write(texts["star_intro"])
+    st.markdown(texts["star_definition"])
+
+    st.markdown(SECTION_TITLES["scent"])
+    st.warning(texts["dislike"])
+
+    st.markdown(SECTION_TITLES["like"])
+    st.success(texts["like"])
+
+    st.divider()
+
+    st.markdown(texts["closing"])
+    
+    st.write("")
+    st.write(SIGNATURE)
+
+# --- 📈 これまでの記録 ---
+HISTORY_PAGE_SIZE = 10
+# お名前が空欄や既定の「Guest」のままの分析は、別の方の記録と混ざるので履歴に残さず、表示もしない
+ANONYMOUS_NAMES = {"", "Guest"}
+
+@st.fragment
+def render_history(client_id):
+    from scoring import JAPAN_TZ
+
+    history = get_history()
+    total = history.count_sessions(client_id)
+    if total < 2:
+        return
+    # ページ送りは「前のページの最後の id」を積んでおき、戻るときは1つ外す
+    cursors = st.session_state.setdefault(f"history_cursors_{client_id}", [None])
+    sessions = history.sessions(client_id, limit=HISTORY_PAGE_SIZE, before=cursors[-1])
+
+    with st.expander(f"📈 これまでの記録（{total}回）"):
+        rows = ["| 日時 | 火 | 地 | 風 | 水 | 好き | 苦手 |", "|:---|---:|---:|---:|---:|:---|:---|"]
+        for session in sessions:
+            when = datetime.fromtimestamp(session["created_at"], JAPAN_TZ).strftime("%Y/%m/%d %H:%M")
+            scores = " | ".join(str(session["scent_scores"][k]) for k in ELEMENT_KEYS)
+            rows.append(f"| {when} | {scores} | {ELEMENT_JP[session['like']]} | {ELEMENT_JP[session['dislike']]} |")
+        st.markdown("\n".join(rows))
+        st.caption("※香り順位計：数字が小さいほど「好き」、大きいほど「苦手」")
+
+        col_prev, col_next = st.columns(2)
+        col_prev.button("← 新しい記録", disabled=len(cursors) == 1, key=f"history_prev_{client_id}",
+                        on_click=cursors.pop)
+        col_next.button("古い記録 →", disabled=len(sessions) < HISTORY_PAGE_SIZE, key=f"history_next_{client_id}",
+                        on_click=cursors.append, args=(sessions[-1]["id"] if sessions else None,))
+
+# --- 📄 PDF ダウンロード ---
+# 作成は PdfRenderer のスレッドで行い、ここでは結果の有無を見るだけ（待たない）
+@st.fragment(run_every=1)
+def wait_for_pdf(pdf_key):
+    renderer = get_pdf_renderer()
+    if not renderer.is_pending(pdf_key):
+        st.rerun()
+    st.caption("PDFを作成しています…")
+
+def render_pdf_download(pdf_key, analysis):
+    from report_pdf import RendererBusy
+
+    renderer = get_pdf_renderer()
+    pdf = renderer.get(pdf_key)
+    if pdf is not None:
+        st.download_button("📄 レポートをPDFでダウンロード", pdf,
+                           file_name="aroma_soul_navigation.pdf", mime="application/pdf")
+        return
+    if renderer.is_pending(pdf_key):
+        wait_for_pdf(pdf_key)
+        return
+    error = renderer.error(pdf_key)
+    if error is not None:
+        st.error(f"PDF Error: {error}")
+    if st.button("📄 レポートをPDFで作成"):
+        try:
+            renderer.submit(pdf_key, analysis)
+        except RendererBusy:
+            st.warning("ただいま混み合っています。少し待ってからもう一度お試しください。")
+            return
+        wait_for_pdf(pdf_key)
+
+# --- 👥 グループ（ワークショップ）モード ---
+GROUP_BASES = {"星（先天的）": "astro", "香り（現在）": "scent"}
+
+@st.cache_data(max_entries=16, show_spinner="参加者を分析しています...")
+def group_analysis(data):
+    import group
+
+    participants, errors = group.parse_participants(group.decode_csv(data))
+    return group.analyze_group(participants, natal_cache=get_natal_cache(), chart_service=get_chart_service()), errors
+
+def render_group_mode():
+    import group
+    from charts import build_compatibility_heatmap
+
+    st.header("👥 グループ（ワークショップ）")
+    st.write("参加者の出生データと香りの順位を CSV で読み込み、2人ずつのエレメントの相性を一覧にします。"
+             "出生地（place）は市区町村の団体コード（6桁）か都道府県名です。")
+    st.download_button("📝 入力用のひな形（CSV）", group.template_csv().encode("utf-8-sig"),
+                       file_name="participants_template.csv", mime="text/csv")
+    uploaded = st.file_uploader("参加者の CSV", type="csv")
+    if uploaded is None:
+        return
+
+    try:
+        download_ephemeris()
+    except Exception as e:
+        st.error(f"System Error: {e}")
+        st.stop()
+
+    from chart_service import ChartServiceBusy, ChartServiceError, ChartServiceTimeout
+
+    try:
+        with span("group"):
+            result, errors = group_analysis(uploaded.getvalue())
+    except (ChartServiceBusy, ChartServiceTimeout) as e:
+        render_busy(e)
+        return
+    except ValueError as e:
+        st.error(f"CSV を読み込めませんでした（UTF-8 か Shift_JIS の CSV で保存してください）: {e}")
+        return
+    except ChartServiceError as e:
+        st.error(f"星の計算に失敗しました。もう一度お試しください: {e}")
+        return
+    if errors:
+        with st.expander(f"⚠️ 読み込めなかった行（{len(errors)}件）", expanded=not result["names"]):
+            st.markdown("\n".join(f"* {line}行目: {message}" for line, message in errors[:50]))
+    names = result["names"]
+    if len(names) < 2:
+        st.warning("2人以上の参加者が必要です。")
+        return
+
+    basis = GROUP_BASES[st.radio("相性の基準", list(GROUP_BASES), horizontal=True)]
+    profiles = group.astro_profile(result) if basis == "astro" else group.scent_profile(result)
+    matrix = group.compatibility_matrix(profiles)
+
+    st.markdown(f"**{len(names)}人の相性（0〜100）**")
+    st.plotly_chart(build_compatibility_heatmap(names, matrix), use_container_width=True)
+
+    rows = ["| 順位 | 組み合わせ | 相性 |", "|---:|:---|---:|"]
+    for rank, (a, b, value) in enumerate(group.top_pairs(names, matrix), start=1):
+        rows.append(f"| {rank} | {a} × {b} | {value:.1f} |")
+    st.markdown("**相性の高い組**")
+    st.markdown("\n".join(rows))
+
+    col_matrix, col_people = st.columns(2)
+    col_matrix.download_button("📥 相性表（CSV）", group.matrix_csv(names, matrix),
+                               file_name=f"compatibility_{basis}.csv", mime="text/csv")
+    col_people.download_button("📥 参加者ごとのスコア（CSV）", group.participants_csv(result),
+                               file_name="participants_scores.csv", mime="text/csv")
+
+# --- 📦 一括処理モード ---
+# 結果はセッションごとに一時ファイルへ書く（8 MB を超えるとディスクに移り、セッションが終われば消える）
+BULK_SPOOL_SIZE = 8 * 1024 * 1024
+BULK_BUSY_RETRIES = 50
+
+def run_bulk(uploaded):
+    import io
+    import tempfile
+
+    from bulk import process_csv
+    from chart_service import ChartServiceBusy, ChartServiceTimeout
+    from group import detect_encoding
+
+    try:
+        download_ephemeris()
+    except Exception as e:
+        st.error(f"System Error: {e}")
+        st.stop()
+    chart_service = get_chart_service()
+
+    def natal_many(births):
+        # 一括処理は途中で止めず、混み合っているときは空くまで待つ。
+        # 一度きりの出生データばかりなので、画面用の NatalCache には入れない
+        for _ in range(BULK_BUSY_RETRIES):
             try:
-                with st.spinner(f'System initializing... {filename}'):
-                    response = requests.get(url)
-                    response.raise_for_status()
-                    with open(filename, 'wb') as f:
-                        f.write(response.content)
-            except Exception as e:
-                st.error(f"System Error: {e}")
-                st.stop()
+                return chart_service.natal_many(births, use_cache=False)
+            except ChartServiceBusy:
+                time.sleep(0.2)
+        return chart_service.natal_many(births, use_cache=False)
+
+    progress = st.progress(0.0, text="処理を始めています...")
+    spool = tempfile.SpooledTemporaryFile(max_size=BULK_SPOOL_SIZE)
+    output = io.TextIOWrapper(spool, encoding="utf-8-sig", newline="")
+    # 文字コードは先頭だけを見て決める（日本語版 Excel の CSV は Shift_JIS）
+    uploaded.seek(0)
+    encoding = detect_encoding(uploaded.read(65536))
+    uploaded.seek(0)
+    lines = io.TextIOWrapper(uploaded, encoding=encoding, newline="")
+    rows = errors = 0
+    try:
+        with span("bulk"):
+            for rows, errors in process_csv(lines, natal_many, output):
+                progress.progress(min(1.0, uploaded.tell() / max(1, uploaded.size)), text=f"{rows:,}行を処理しました")
+        output.flush()
+    except (ChartServiceBusy, ChartServiceTimeout) as e:
+        render_busy(e)
+        return None
+    except ValueError as e:
+        st.error(f"CSV を読み込めませんでした（UTF-8 か Shift_JIS の CSV で、ひな形と同じ列があるか確認してください）: {e}")
+        return None
+    finally:
+        # アップロードされたファイルと一時ファイルを閉じないよう、ラッパーだけ外す
+        lines.detach()
+        output.detach()
+        progress.empty()
+    return {"file_id": uploaded.file_id, "file": spool, "rows": rows, "errors": errors}
+
+def render_bulk_mode():
+    import group
+
+    st.header("📦 一括処理（CSV）")
+    st.write("たくさんの方の出生データと香りの順位を CSV で読み込み、1行ずつ分析して結果を CSV で書き出します。"
+             "列はグループモードのひな形と同じです（出生地は place 列、または都道府県名の prefecture 列）。"
+             "読み込めなかった行は、理由を error 列に入れて結果に残します。")
+    st.download_button("📝 入力用のひな形（CSV）", group.template_csv().encode("utf-8-sig"),
+                       file_name="bulk_template.csv", mime="text/csv", on_click="ignore")
+    uploaded = st.file_uploader("取り込む CSV", type="csv", key="bulk_upload")
+    if uploaded is None:
+        return
+
+    # 同じファイルの結果があれば、再実行のたびに処理し直さない
+    result = st.session_state.get("bulk_result")
+    if result is None or result["file_id"] != uploaded.file_id:
+        if not st.button("分析を始める", type="primary"):
+            return
+        st.session_state.pop("bulk_result", None)
+        result = run_bulk(uploaded)
+        if result is None:
+            return
+        st.session_state["bulk_result"] = result
+
+    st.success(f"{result['rows']:,}行を処理しました（読み込めなかった行: {result['errors']:,}行）")
+    result["file"].seek(0)
+    st.download_button("📥 分析結果（CSV）", result["file"].read(), file_name="aroma_bulk_results.csv",
+                       mime="text/csv", type="primary", on_click="ignore")
+
+# --- ⚙️ 管理者用パネル ---
+# AROMA_ADMIN_TOKEN を設定し、URL に ?admin=<トークン> を付けたときだけ表示する
+def render_admin_panel():
+    token = os.environ.get("AROMA_ADMIN_TOKEN")
+    if not token or st.query_params.get("admin") != token:
+        return
+    with st.sidebar.expander("⚙️ 処理時間（直近）"):
+        rows = ["| 段階 | p50 (ms) | p95 (ms) | 件数 | エラー |", "|---|---:|---:|---:|---:|"]
+        for name, s in metrics.snapshot().items():
+            rows.append(f"| {name} | {s['p50_ms']:.2f} | {s['p95_ms']:.2f} | {s['count']} | {s['errors']} |")
+        st.markdown("\n".join(rows))
+        st.caption(f"natal cache: {get_natal_cache().stats()}")
+        st.caption(f"figure cache: {get_figure_cache().stats()}")
+        st.caption(f"chart service: {get_chart_service().stats()}")
+        if get_history() is not None:
+            st.caption(f"history: {get_history().stats()}")
 
 # --- Main App ---
 def main():
     st.set_page_config(page_title="Aroma Soul Navigation", layout="wide")
+    st.markdown(PRINT_CSS, unsafe_allow_html=True)
 
-    # --- 🖨️ 印刷設定（スマホ全ページ出力・最終対策版） ---
-    st.markdown("""
-        <style>
-        @media print {
-            /* 1. 【CRITICAL FIX】全体を印刷モードで全展開させる */
-            html, body, [data-testid="stAppViewContainer"], [data-testid="stApp"], .main {
-                overflow: visible !important; /* スクロール機能を無効化 */
-                height: auto !important; /* 高さをコンテンツに合わせて全展開 */
-                position: static !important; 
-            }
-            
-            /* 2. 不要な要素を消す */
-            [data-testid="stSidebar"], .stButton, header, footer, [data-testid="stToolbar"] {
-                display: none !important;
-            }
-            
-            /* 3. 用紙設定 (A4) */
-            @page {
-                size: A4 portrait;
-                margin: 5mm; 
-            }
-
-            /* 4. 全体の縮尺調整 (横幅と縦幅の同時対策) */
-            .block-container {
-                max-width: 100% !important;
-                width: 100% !important;
-                padding: 0 !important;
-                margin: 0 !important;
-                zoom: 0.75 !important; /* 横の切れを防ぐため75%に縮小 */
-            }
-
-            /* 5. 文字の折り返し設定 */
-            .stMarkdown, p, h1, h2, h3, h4, h5, h6, li, span, div {
-                white-space: pre-wrap !important;
-                word-wrap: break-word !important;
-            }
-
-            /* 6. カラムを強制的に「横並び」にし、改ページを防ぐ */
-            [data-testid="stHorizontalBlock"] {
-                display: flex !important;
-                flex-direction: row !important;
-                flex-wrap: nowrap !important;
-            }
-            
-            [data-testid="column"] {
-                flex: 1 !important;
-                width: auto !important;
-                page-break-inside: avoid !important;
-            }
-            
-            /* 7. グラフのサイズ調整 */
-            .stPlotlyChart {
-                width: 100% !important;
-                height: auto !important;
-                page-break-inside: avoid;
-            }
-        }
-        </style>
-    """, unsafe_allow_html=True)
-
-    # 初期化
-    download_ephemeris()
-    swe.set_ephe_path(os.getcwd())
-
-    # --- 🌟 辞書データ ---
-    SIGN_JP = {
-        "Aries": "牡羊座", "Taurus": "牡牛座", "Gemini": "双子座", "Cancer": "蟹座",
-        "Leo": "獅子座", "Virgo": "乙女座", "Libra": "天秤座", "Scorpio": "蠍座",
-        "Sagittarius": "射手座", "Capricorn": "山羊座", "Aquarius": "水瓶座", "Pisces": "魚座"
-    }
-
-    PREFECTURES = {
-        "北海道": (43.06, 141.35), "青森県": (40.82, 140.74), "岩手県": (39.70, 141.15),
-        "宮城県": (38.26, 140.87), "秋田県": (39.71, 140.10), "山形県": (38.24, 140.36),
-        "福島県": (37.75, 140.46), "茨城県": (36.34, 140.44), "栃木県": (36.56, 139.88),
-        "群馬県": (36.39, 139.06), "埼玉県": (35.85, 139.64), "千葉県": (35.60, 140.12),
-        "東京都": (35.68, 139.69), "神奈川県": (35.44, 139.64), "新潟県": (37.90, 139.02),
-        "富山県": (36.69, 137.21), "石川県": (36.59, 136.62), "福井県": (36.06, 136.22),
-        "山梨県": (35.66, 138.56), "長野県": (36.65, 138.18), "岐阜県": (35.39, 136.72),
-        "静岡県": (34.97, 138.38), "愛知県": (35.18, 136.90), "三重県": (34.73, 136.50),
-        "滋賀県": (35.00, 135.86), "京都府": (35.02, 135.75), "大阪府": (34.68, 135.52),
-        "兵庫県": (34.69, 135.18), "奈良県": (34.68, 135.80), "和歌山県": (34.22, 135.16),
-        "鳥取県": (35.50, 134.23), "島根県": (35.47, 133.05), "岡山県": (34.66, 133.93),
-        "広島県": (34.39, 132.46), "山口県": (34.18, 131.47), "徳島県": (34.06, 134.55),
-        "香川県": (34.34, 134.04), "愛媛県": (33.84, 132.76), "高知県": (33.55, 133.53),
-        "福岡県": (33.60, 130.41), "佐賀県": (33.24, 130.29), "長崎県": (32.74, 129.87),
-        "熊本県": (32.78, 130.74), "大分県": (33.23, 131.61), "宮崎県": (31.91, 131.42),
-        "鹿児島県": (31.56, 130.55), "沖縄県": (26.21, 127.68)
-    }
-
-    ELEMENTS = {
-        "Fire": ["Aries", "Leo", "Sagittarius"],
-        "Earth": ["Taurus", "Virgo", "Capricorn"],
-        "Air": ["Gemini", "Libra", "Aquarius"],
-        "Water": ["Cancer", "Scorpio", "Pisces"]
-    }
-
-    ELEMENT_JP = {
-        "Fire": "🔥 火 (胆汁質)",
-        "Earth": "🌏 地 (神経質)",
-        "Air": "🌬️ 風 (多血質)",
-        "Water": "💧 水 (リンパ質)"
-    }
-
-    COLORS = {
-        'Fire': '#FFCA99', 'Earth': '#A4D65E', 'Air': '#FFACC7', 'Water': '#87CEEB'
-    }
-
-    OIL_NAMES = {
-        "Fire": "ローレル、ユーカリ・ラディアタ、オレンジ・スイート",
-        "Earth": "ラベンダー・アングスティフォリア、カモマイル・ローマン、イランイラン",
-        "Air": "ホーウッド、パルマローザ、マジョラム",
-        "Water": "レモングラス、リトセア、ユーカリ・レモン、ローズマリー・カンファー"
-    }
-
-    BIG3_EXPLANATION = {
-        "Sun": "あなたがこの世に生まれ持った「魂の核」であり、意識的に目指すべき人生のテーマです。社会の中で輝くための「表の顔」であり、迷った時に立ち返るべきエネルギーの源です。",
-        "Moon": "あなたの無意識、感情、プライベートな素顔を表します。理屈ではなく「快・不快」を感じるセンサーであり、心がリラックスして満たされるために必要な要素です。",
-        "Asc": "他者から見たあなたの第一印象や、無意識に出てしまう行動パターン、生まれ持った資質を表します。「世界への玄関口」とも呼ばれ、あなたが社会と接する際のマスク（仮面）のような役割を持ちます。"
-    }
-
-    STAR_DEFINITIONS = {
-        "Fire": """
-        **【🔥 火の気質を多く持つ方の定義】**（胆汁質：牡羊座、獅子座、射手座など）  
-        * **本来の資質:** 「決断力、行動力、情熱、自己信頼」といった火のエレメントを核に持つ、リーダーシップと目標達成能力に優れた資質です。
-        * **美点の活用:** 迷わず目標に向かって進む力があなたの人生を推進します。
-        """,
-        "Earth": """
-        **【🌏 土の気質を持つ方の定義】**（神経質：牡牛座、乙女座、山羊座など）  
-        * **本来の資質:** 「安定性、堅実さ、継続力、現実的な実行力」といった土のエレメントを核に持つ、目標を確実に形にする力と、安心感を生み出す資質です。
-        * **美点の活用:** 現実の基礎を築き、ブレずに物事をやり遂げる力があなたの人生を支えます。
-        """,
-        "Air": """
-        **【🌬️ 風の気質を持つ方の定義】**（多血質：双子座、天秤座、水瓶座など）  
-        * **本来の資質:** 「社交性、柔軟性、好奇心、論理的な思考力」といった風のエレメントを核に持つ、コミュニケーション能力と、状況を多角的に捉える資質です。
-        * **美点の活用:** 軽やかに人と繋がり、新しい情報を取り入れ、人生に変化と広がりをもたらします。
-        """,
-        "Water": """
-        **【💧 水の気質を持つ方の定義】**（リンパ質：蟹座、蠍座、魚座など）  
-        * **本来の資質:** 「共感力、受容性、優しさ、直感力」といった水のエレメントを核に持つ、他者の感情を深く理解し、調和を生み出す資質です。
-        * **美点の活用:** 場の雰囲気や人間関係を円滑にし、深い感情的な満足を人生にもたらします。
-        """
-    }
-
-    DISLIKE_ANALYSIS = {
-        "Fire": """
-        **【🔥 胆汁質タイプ】：「火」が過剰になり、休息を求めている可能性**
-        * **苦手な香り:** [DISLIKE_OIL] など
-        * 心身が「火」のエレメントを拒否しているのは、ご自身のエネルギーが十分に満たされている証拠ですが、太陽星座が火のエレメント以外の場合は、怒りの感情の抑圧や心身の隠れた炎症を示している可能性もあります。
-        
-        この場合「決断力と情熱」が、過剰になりすぎている状態です。この火のアンバランスが、心身の疲弊や自己強制の罠を生み出し、迷いの原因となっている可能性があります。太陽星座が火のエレメントの方の通常モードではありますが、そうでない場合は、ご自身の心と体に怒りの感情の抑圧や隠れた炎症がないか向き合ってみてください。
-        """,
-        "Earth": """
-        **【🌏 神経質タイプ】：本来の「土」が過剰になり、停滞感を感じている可能性**
-        * **苦手な香り:** [DISLIKE_OIL] など
-        * ご自身が「土」のエレメントを拒否しているのは、ご自身のエネルギーが十分に満たされている証拠ですが、太陽星座が土のエレメント以外の場合は、考えすぎて動けない時や疲れている時にこの香りが苦手に感じます。
-        
-        **迷いの原因:** （土）の「堅実な継続力」が、「変化への恐れ」に転じてしまっています。この土のアンバランスが、同じ悩みを繰り返す停滞感を生み出し、迷いの原因となっている可能性があります。太陽星座が土のエレメントの方の通常モードではありますが、そうでない場合は、今が考えすぎて動けない時ではないか、ご自身の心身と向き合ってみてください。
-        """,
-        "Air": """
-        **【🌬️ 多血質タイプ】：本来の「風」が過剰になり、地に足がついていない可能性**
-        * **苦手な香り:** [DISLIKE_OIL] など
-        * 心身が「風」のエレメントを拒否しているのは、ご自身のエネルギーが十分に満たされている証拠ですが、太陽星座が風のエレメント以外の場合は、地に足をつけて安心したいのかもしれません。
-        
-        **迷いの原因:** （風）の「社交性と柔軟性」が、「散漫さや軽薄さ」に転じてしまっています。この風のアンバランスが同じ悩みを繰り返す停滞感を生み出し、迷いの原因となっている可能性があります。
-        
-        太陽星座が風のエレメントの方の通常モードではありますが、そうでない場合は、今が散漫さや軽薄さがでていないか、ご自身の心身と向き合ってみてください。
-        """,
-        "Water": """
-        **【💧 リンパ質タイプ】：「水」が過剰になり、自己主張ができていない可能性**
-        * **苦手な香り:** [DISLIKE_OIL] など
-        * 心身が「水」のエレメントを拒否しているのは、「受容と調和（水）」を重視するあまり、自己主張や決断を下すことを心身が避けているサインかもしれません。
-        
-        **迷いの原因:** （水）の「優しさや共感力」が、「自己犠牲や受動性」に転じてしまっています。この水のアンバランスが他者の意見に流されることによる迷いを生み出している可能性があります。
-        
-        太陽星座が水のエレメントの方の通常モードではありますが、そうでない場合は、今我慢しすぎていたり、人のために生きすぎているかもしれません。自分に優しい時間を取ってみてください。
-        """
-    }
-
-    # --- 4. 好きな香りはあなたを調和させます (好き＝不足・薬) ---
-    LIKE_ANALYSIS = {
-        "Fire": """
-        * **好きな香り:** [LIKE_OIL] など
-        * 「火」の香りを好むのは、今の環境からさらに能動的になりたい、情熱をもって行動したいというニーズが強い一方で、自分から前に出るためのエネルギー（火）が圧倒的に不足している状態を示しています。
-        * 自分の人生を自分で決め、情熱をもって行動するためのエネルギー（火）をこの香りは持っています。
-        * あなたの決断力行動力を支えます。
-        """,
-        "Earth": """
-        * **好きな香り:** [LIKE_OIL] など
-        * 「土」の香りを好むのは、地に足をつけて、冷静に過ごしたいときです。
-        * 静かに五感が満たされる時間をすごしましょう。
-        """,
-        "Air": """
-        * **好きな香り:** [LIKE_OIL] など
-        * 「風」の香りを好むのは、現状に新しい風（風）を入れてバランスを取ろうとされているサインです。
-        * 楽しいことを取り入れたり、考えすぎず執着せず緩く過ごしたいときです。
-        """,
-        "Water": """
-        * **好きな香り:** [LIKE_OIL] など
-        * 心身が「水」のエレメントを好むのは、休息やクールダウン、受容することを心身が強く求めているサインかもしれません。
-        * 我慢しすぎていないか、体に炎症がないか、疲れすぎていないか、心身に聞いてみてください。
-        """
-    }
-
-    SCENTS_CONF = [
-        {"element": "Fire", "name": "🔥 A (胆汁)", "key": "scent_a"},
-        {"element": "Fire", "name": "🔥 B (胆汁)", "key": "scent_b"},
-        {"element": "Air", "name": "🌬️ C (多血)", "key": "scent_c"},
-        {"element": "Air", "name": "🌬️ D (多血)", "key": "scent_d"},
-        {"element": "Earth", "name": "🌏 E (神経)", "key": "scent_e"},
-        {"element": "Earth", "name": "🌏 F (神経)", "key": "scent_f"},
-        {"element": "Water", "name": "💧 G (リンパ)", "key": "scent_g"},
-        {"element": "Water", "name": "💧 H (リンパ)", "key": "scent_h"},
-    ]
-
-    PLANET_SCORES = {
-        "Sun": 5, "Moon": 5, "Asc": 5, "Mc": 5,
-        "Mercury": 3, "Venus": 3, "Mars": 3,
-        "Jupiter": 2, "Saturn": 2,
-        "Uranus": 1, "Neptune": 1, "Pluto": 1
-    }
+    setup_metrics()
 
     st.title("Aroma Soul Navigation 🌟")
+
+    mode = st.sidebar.radio("モード", ["個人", "グループ", "一括"], horizontal=True)
+    if mode != "個人":
+        render_admin_panel()
+        if mode == "グループ":
+            render_group_mode()
+        else:
+            render_bulk_mode()
+        start_warmup()
+        return
+
     st.markdown("### 星（先天的）と 香り（現在）の体質バランス比較")
 
-    with st.sidebar:
+    # 入力はフォームにまとめ、「分析する」を押したときだけ再実行する
+    with st.sidebar, st.form("analysis_form", border=False):
         st.header("1. 出生データの入力")
-        name = st.text_input("お名前", "Guest")
+        name = st.text_input("お名前", "Guest", help="「Guest」や空欄のままでは、これまでの記録に残りません")
         col_b1, col_b2, col_b3 = st.columns(3)
         b_year = col_b1.number_input("年", 1950, 2025, 1990)
         b_month = col_b2.number_input("月", 1, 12, 1)
@@ -279,7 +546,10 @@ def main():
         col_b4, col_b5 = st.columns(2)
         b_hour = col_b4.number_input("時", 0, 23, 12)
         b_min = col_b5.number_input("分", 0, 59, 0)
-        city_name = st.selectbox("出生地 (都道府県)", list(PREFECTURES.keys()))
+        # 市区町村（約1,900件）。名前・よみがなの一部を入力すると候補が絞られる
+        gazetteer = load_gazetteer()
+        place_index = st.selectbox("出生地 (市区町村)", range(len(gazetteer)), format_func=gazetteer.label)
+        place = gazetteer.place(place_index)["code"]
         
         st.markdown("---")
         st.header("2. 香りの順位チェック")
@@ -293,148 +563,93 @@ def main():
             scent_ranks[scent["key"]] = rank
 
         st.markdown("---")
-        calc_btn = st.button("分析する", type="primary")
+        calc_btn = st.form_submit_button("分析する", type="primary")
+
+    render_admin_panel()
+    # 入力画面を出し終えてから、分析に使うモジュールと天体暦を裏で準備する
+    start_warmup()
 
     if calc_btn:
+        # 前後の空白だけが違う名前を別の人として記録しないよう、ここで1回だけ取り除く
+        st.session_state["analysis_input"] = {
+            "name": name.strip(),
+            "birth": (b_year, b_month, b_day, b_hour, b_min, place),
+            "scent_ranks": scent_ranks,
+        }
+
+    # 送信済みの入力があれば、その後の再実行でもレポートを表示し続ける
+    analysis_input = st.session_state.get("analysis_input")
+    if analysis_input:
+        # 初期化（裏での準備が済んでいれば待たない）
         try:
-            # 1. 星の計算
-            date_str = f"{b_year}/{b_month:02d}/{b_day:02d}"
-            time_str = f"{b_hour:02d}:{b_min:02d}"
-            date = Datetime(date_str, time_str, '+09:00')
-            lat, lon = PREFECTURES[city_name]
-            pos = GeoPos(lat, lon)
-            chart = Chart(date, pos, IDs=const.LIST_OBJECTS)
-
-            sun_obj = chart.get(const.SUN)
-            astro_sun_elem = get_element(sun_obj.sign)
-
-            astro_scores = {"Fire": 0, "Earth": 0, "Air": 0, "Water": 0}
-            targets = [const.SUN, const.MOON, const.MERCURY, const.VENUS, const.MARS, 
-                       const.JUPITER, const.SATURN, const.URANUS, const.NEPTUNE, const.PLUTO,
-                       const.ASC, const.MC]
-            target_names = ["Sun", "Moon", "Mercury", "Venus", "Mars", 
-                           "Jupiter", "Saturn", "Uranus", "Neptune", "Pluto", "ASC", "MC"]
-
-            for i, body_id in enumerate(targets):
-                obj = chart.get(body_id)
-                element = get_element(obj.sign)
-                if element:
-                    astro_scores[element] += PLANET_SCORES.get(target_names[i], 0)
-
-            # 2. 香りの計算
-            scent_scores = {"Fire": 0, "Earth": 0, "Air": 0, "Water": 0}
-            min_ranks = {"Fire": 9, "Earth": 9, "Air": 9, "Water": 9}
-            max_ranks = {"Fire": 0, "Earth": 0, "Air": 0, "Water": 0}
-
-            for scent in SCENTS_CONF:
-                rank = scent_ranks[scent["key"]]
-                elem = scent["element"]
-                scent_scores[elem] += rank
-                if rank < min_ranks[elem]: min_ranks[elem] = rank
-                if rank > max_ranks[elem]: max_ranks[elem] = rank
+            download_ephemeris()
+        except Exception as e:
+            st.error(f"System Error: {e}")
+            st.stop()
+
+        from chart_service import ChartServiceBusy, ChartServiceTimeout
+        from scoring import compute_scent, get_element
+
+        try:
+            # 以前に来られた方なら、星のサインは履歴から返す（Chart を計算し直さない）
+            history = get_history()
+            if analysis_input["name"] in ANONYMOUS_NAMES:
+                history = None
+            with span("natal"):
+                natal = None
+                if history is not None:
+                    natal = history.natal(analysis_input["name"], analysis_input["birth"])
+                if natal is None:
+                    try:
+                        natal = get_chart_service().natal(analysis_input["birth"])
+                    except (ChartServiceBusy, ChartServiceTimeout) as e:
+                        render_busy(e)
+                        return
+            signs = natal["signs"]
+            astro_scores = natal["astro_scores"]
+            with span("scent"):
+                scent_scores, like_scent_elem, dislike_scent_elem = compute_scent(analysis_input["scent_ranks"])
 
             # 診断ロジック
-            core_star_elem = astro_sun_elem
-            like_scent_elem = min(scent_scores.keys(), key=lambda k: (scent_scores[k], min_ranks[k]))
-            dislike_scent_elem = max(scent_scores.keys(), key=lambda k: (scent_scores[k], -max_ranks[k]))
+            core_star_elem = get_element(signs["Sun"])
+
+            # 送信1回につき1件だけ履歴に残す（その後の再実行では保存しない）
+            if history is not None and "client_id" not in analysis_input:
+                with span("history"):
+                    history.record(analysis_input["name"], analysis_input["birth"], analysis_input["scent_ranks"], {
+                        "signs": signs,
+                        "core": core_star_elem,
+                        "like": like_scent_elem,
+                        "dislike": dislike_scent_elem,
+                    })
+                    analysis_input["client_id"] = history.find_client(analysis_input["name"], analysis_input["birth"])
 
             # --- 結果表示 ---
-            st.header(f"【Aroma Soul Navigation 】あなたの「迷いの原因」分析レポート")
-            st.write("「今の心身の状態」と「本来の資質」のズレを分析いたしました。")
-            
-            # --- Big 3 ---
-            with st.container(border=True):
-                c1, c2, c3 = st.columns(3)
-                with c1:
-                    st.markdown(f"**☀️ 太陽 (本質)**")
-                    st.write(f"### {SIGN_JP[sun_obj.sign]}")
-                    st.caption(BIG3_EXPLANATION['Sun'])
-                with c2:
-                    st.markdown(f"**🌙 月 (内面)**")
-                    st.write(f"### {SIGN_JP[chart.get(const.MOON).sign]}")
-                    st.caption(BIG3_EXPLANATION['Moon'])
-                with c3:
-                    st.markdown(f"**🏹 ASC (外見)**")
-                    st.write(f"### {SIGN_JP[chart.get(const.ASC).sign]}")
-                    st.caption(BIG3_EXPLANATION['Asc'])
-
-            st.write("") 
-
-            # --- グラフとスコア ---
-            col_g1, col_g2 = st.columns([1, 1.2])
-            
-            with col_g1:
-                st.markdown("**スコア内訳**")
-                df_res = pd.DataFrame([
-                    {"性質": ELEMENT_JP[e], "星": astro_scores[e], "香り(順位計)": scent_scores[e]} 
-                    for e in ["Fire", "Earth", "Air", "Water"]
-                ])
-                st.dataframe(df_res, hide_index=True, use_container_width=True)
-                st.caption("※香り順位計：数字が小さいほど「好き」、大きいほど「苦手」")
-
-            with col_g2:
-                labels_list = [ELEMENT_JP[k] for k in ["Fire", "Earth", "Air", "Water"]]
-                colors_list = [COLORS[k] for k in ["Fire", "Earth", "Air", "Water"]]
-                astro_values = [astro_scores[k] for k in ["Fire", "Earth", "Air", "Water"]]
-                scent_values = [scent_scores[k] for k in ["Fire", "Earth", "Air", "Water"]]
-
-                fig = make_subplots(rows=1, cols=2, specs=[[{'type':'domain'}, {'type':'domain'}]],
-                                    subplot_titles=['<b>星 (先天的)</b>', '<b>香り (現在)</b>'])
-                fig.add_trace(go.Pie(labels=labels_list, values=astro_values, marker_colors=colors_list, hole=.4, showlegend=False), 1, 1)
-                fig.add_trace(go.Pie(labels=labels_list, values=scent_values, marker_colors=colors_list, hole=.4, showlegend=False), 1, 2)
-                fig.update_layout(margin=dict(t=20, b=0, l=0, r=0))
-                st.plotly_chart(fig, use_container_width=True)
-
-            # --- 診断レポート ---
-            st.markdown("---")
-            
-            st.markdown("#### 1. 分析結果の概要")
-            st.info(f"""
-            香り反応ワークで特に強い反応が出たのは以下の点でした。
-            
-            * **一番心地よかった香り**（今、心身が必要としているエネルギー）：  
-              **{OIL_NAMES[like_scent_elem]}** ({ELEMENT_JP[like_scent_elem]})
-            
-            * **一番苦手だった香り**（今、心身が拒否・抑圧しているエネルギー）：  
-              **{OIL_NAMES[dislike_scent_elem]}** ({ELEMENT_JP[dislike_scent_elem]})
-            
-            この結果から、あなたの「迷い」の正体が明確に見えてきました。
-            
-            本来のあなたは **【{ELEMENT_JP[core_star_elem]}】** の要素を持っています。  
-            今のあなたの心身の過剰なところを表しているのは **【{ELEMENT_JP[dislike_scent_elem]}】**、  
-            今のあなたが求めていることは **【{ELEMENT_JP[like_scent_elem]}】** です。
-            """)
-
-            st.markdown(f"#### 2. 本来の資質（星）の解釈：あなたの魂のバランス")
-            st.write(f"まず、あなたが生まれ持った魂のバランス、すなわち【{ELEMENT_JP[core_star_elem]}】が持つ、本来の美点とエネルギーを定義します。")
-            st.markdown(STAR_DEFINITIONS[core_star_elem])
-
-            st.markdown(f"#### 3. 香りの好みで見える体質")
-            # 苦手の分析
-            dislike_text = DISLIKE_ANALYSIS[dislike_scent_elem].replace("[DISLIKE_OIL]", OIL_NAMES[dislike_scent_elem])
-            st.warning(dislike_text)
-
-            st.markdown("#### 【好きな香りはあなたを調和させます】")
-            # 好きの分析
-            like_text = LIKE_ANALYSIS[like_scent_elem].replace("[LIKE_OIL]", OIL_NAMES[like_scent_elem])
-            st.success(like_text)
-
-            st.divider()
-
-            st.markdown(f"""
-            「ズレ」は、決して直すべき欠点ではありません。  
-            むしろ、本来の才能を活かすために必要な「エネルギーの調整」を心身が求めているサインです。
-            
-            好きな香りである **{ELEMENT_JP[like_scent_elem]}** の精油 **【{OIL_NAMES[like_scent_elem]}】** が求めるエネルギーを補い、  
-            苦手な香りである **{ELEMENT_JP[dislike_scent_elem]}** の精油 **【{OIL_NAMES[dislike_scent_elem]}】** が示す過剰なエネルギーを穏やかに整えることで、  
-            あなたが本来お持ちの **【{ELEMENT_JP[core_star_elem]}】** の才能（美点）は、迷いなく輝き始めます。
-            """)
-            
-            st.write("")
-            st.write("**アロマクオーレ 本多さえこ**")
+            st.header(INTRO_TITLE)
+            st.write(INTRO_TEXT)
+
+            render_big3(signs)
+            render_scores(astro_scores, scent_scores)
+            render_timeline(astro_scores)
+            render_report(core_star_elem, like_scent_elem, dislike_scent_elem)
+            if history is not None and "client_id" in analysis_input:
+                render_history(analysis_input["client_id"])
+
+            pdf_key = (analysis_input["name"], analysis_input["birth"],
+                       tuple(sorted(analysis_input["scent_ranks"].items())))
+            render_pdf_download(pdf_key, {
+                "name": analysis_input["name"],
+                "signs": signs,
+                "astro_scores": astro_scores,
+                "scent_scores": scent_scores,
+                "core": core_star_elem,
+                "like": like_scent_elem,
+                "dislike": dislike_scent_elem,
+            })
 
         except Exception as e:
             st.error(f"Error: {e}")
 
 if __name__ == "__main__":
-    main()
+    with span("rerun"):
+        main()
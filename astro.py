@@ -0,0 +1,148 @@
+# --- 🌟 星のスコア計算エンジン ---
+# flatlib の Chart は全天体・ハウス・オブジェクトを組み立てるため重い。
+# スコアに必要なのは10天体 + ASC + MC のサインだけなので、swisseph を直接呼ぶ。
+import os
+import struct
+import sys
+from array import array
+from bisect import bisect_right
+from datetime import timezone
+
+import swisseph as swe
+
+SIGNS = [
+    "Aries", "Taurus", "Gemini", "Cancer", "Leo", "Virgo",
+    "Libra", "Scorpio", "Sagittarius", "Capricorn", "Aquarius", "Pisces"
+]
+
+# サイン番号 % 4 がそのままエレメント番号になる（牡羊=火, 牡牛=地, 双子=風, 蟹=水 ...）
+ELEMENT_ORDER = ["Fire", "Earth", "Air", "Water"]
+
+PLANET_SCORES = {
+    "Sun": 5, "Moon": 5, "Asc": 5, "Mc": 5,
+    "Mercury": 3, "Venus": 3, "Mars": 3,
+    "Jupiter": 2, "Saturn": 2,
+    "Uranus": 1, "Neptune": 1, "Pluto": 1
+}
+
+PLANETS = [
+    ("Sun", swe.SUN), ("Moon", swe.MOON), ("Mercury", swe.MERCURY),
+    ("Venus", swe.VENUS), ("Mars", swe.MARS), ("Jupiter", swe.JUPITER),
+    ("Saturn", swe.SATURN), ("Uranus", swe.URANUS), ("Neptune", swe.NEPTUNE),
+    ("Pluto", swe.PLUTO)
+]
+
+# 月以外の天体は 1950〜2025年のイングレス（サイン移動）表から二分探索で引く
+INGRESS_BODIES = [name for name, _ in PLANETS if name != "Moon"]
+INGRESS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "ingress.bin")
+INGRESS_MAGIC = b"ASNI"
+INGRESS_VERSION = 1
+
+# flatlib の既定ハウスシステム（Alcabitus）。ASC/MC はハウスシステムに依存しない
+HOUSE_SYSTEM = b'B'
+
+
+def julday_ut(dt):
+    # タイムゾーン付き datetime を世界時のユリウス日に変換（naive は UTC とみなす）
+    if dt.tzinfo is not None:
+        dt = dt.astimezone(timezone.utc)
+    hour = dt.hour + dt.minute / 60.0 + dt.second / 3600.0
+    return swe.julday(dt.year, dt.month, dt.day, hour)
+
+
+def sign_index(lon):
+    return int(lon // 30) % 12
+
+
+def score_signs(sign_indexes):
+    scores = [0, 0, 0, 0]
+    for name, idx in sign_indexes.items():
+        scores[idx % 4] += PLANET_SCORES[name]
+    return dict(zip(ELEMENT_ORDER, scores))
+
+
+# --- イングレス表 ---
+# ファイル形式（リトルエンディアン）:
+#   ヘッダ: magic(4s) version(H) 天体数(H) 開始JD(d) 終了JD(d)
+#   天体ごと: 名前(8s) 件数(I)、続けて JD(float64 x 件数) とサイン番号(uint8 x 件数)
+# 各天体の先頭エントリは開始JD時点のサイン。
+_HEADER = struct.Struct("<4sHHdd")
+_BODY_HEADER = struct.Struct("<8sI")
+
+_ingress = None
+
+
+def write_ingress(path, start_jd, end_jd, tables):
+    with open(path, "wb") as f:
+        f.write(_HEADER.pack(INGRESS_MAGIC, INGRESS_VERSION, len(tables), start_jd, end_jd))
+        for name, (jds, signs) in tables.items():
+            jd_arr = array("d", jds)
+            if sys.byteorder == "big":
+                jd_arr.byteswap()
+            f.write(_BODY_HEADER.pack(name.encode("ascii"), len(jd_arr)))
+            f.write(jd_arr.tobytes())
+            f.write(bytes(signs))
+
+
+def read_ingress(path):
+    with open(path, "rb") as f:
+        data = f.read()
+    magic, version, count, start_jd, end_jd = _HEADER.unpack_from(data, 0)
+    if magic != INGRESS_MAGIC or version != INGRESS_VERSION:
+        raise ValueError(f"unsupported ingress file: {path}")
+    offset = _HEADER.size
+    tables = {}
+    for _ in range(count):
+        raw_name, n = _BODY_HEADER.unpack_from(data, offset)
+        offset += _BODY_HEADER.size
+        jds = array("d")
+        jds.frombytes(data[offset:offset + 8 * n])
+        if sys.byteorder == "big":
+            jds.byteswap()
+        offset += 8 * n
+        signs = data[offset:offset + n]
+        offset += n
+        tables[raw_name.rstrip(b"\0").decode("ascii")] = (jds, signs)
+    return {"start": start_jd, "end": end_jd, "tables": tables}
+
+
+def load_ingress():
+    # 初回だけ読み込む。表が無ければ空にして、全天体を swisseph で計算する
+    global _ingress
+    if _ingress is None:
+        try:
+            _ingress = read_ingress(INGRESS_PATH)
+        except (OSError, ValueError, struct.error):
+            _ingress = {"start": 0.0, "end": 0.0, "tables": {}}
+    return _ingress
+
+
+def ingress_sign(name, jd_ut):
+    index = load_ingress()
+    table = index["tables"].get(name)
+    if table is None or not (index["start"] <= jd_ut < index["end"]):
+        return None
+    jds, signs = table
+    return signs[bisect_right(jds, jd_ut) - 1]
+
+
+def compute_sign_indexes(jd_ut, lat, lon):
+    result = {}
+    for name, body in PLANETS:
+        idx = ingress_sign(name, jd_ut)
+        if idx is None:
+            pos, _ = swe.calc_ut(jd_ut, body, swe.FLG_SWIEPH)
+            idx = sign_index(pos[0])
+        result[name] = idx
+    _, ascmc = swe.houses(jd_ut, lat, lon, HOUSE_SYSTEM)
+    result["Asc"] = sign_index(ascmc[0])
+    result["Mc"] = sign_index(ascmc[1])
+    return result
+
+
+def compute_element_scores(dt, lat, lon):
+    idx = compute_sign_indexes(julday_ut(dt), lat, lon)
+    return {
+        "signs": {name: SIGNS[i] for name, i in idx.items()},
+        "astro_scores": score_signs(idx),
+    }
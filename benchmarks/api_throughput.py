@@ -0,0 +1,111 @@
+# --- ⏱️ JSON API のスループット計測 ---
+# api.py をこのプロセス内で起動し（--url 指定時は既存のサーバーへ）、並列にリクエストを投げる。
+#   python benchmarks/api_throughput.py [--requests 5000] [--concurrency 32] [--url http://host:port]
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import aiohttp
+from aiohttp import web
+
+from content import PREFECTURES, SCENTS_CONF
+
+
+def random_payload(rng):
+    ranks = list(range(1, len(SCENTS_CONF) + 1))
+    rng.shuffle(ranks)
+    return {
+        "name": "bench",
+        "birth": {
+            "year": rng.randint(1950, 2025),
+            "month": rng.randint(1, 12),
+            "day": rng.randint(1, 28),
+            "hour": rng.randint(0, 23),
+            "minute": rng.randint(0, 59),
+        },
+        "prefecture": rng.choice(list(PREFECTURES)),
+        "scent_ranks": {scent["key"]: rank for scent, rank in zip(SCENTS_CONF, ranks)},
+    }
+
+
+async def run(url, total, concurrency, seed):
+    rng = random.Random(seed)
+    payloads = [random_payload(rng) for _ in range(total)]
+    latencies = []
+    errors = 0
+    queue = asyncio.Queue()
+    for payload in payloads:
+        queue.put_nowait(payload)
+
+    async def worker(session):
+        nonlocal errors
+        while True:
+            try:
+                payload = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            start = time.perf_counter()
+            async with session.post(url + "/analyze", json=payload) as response:
+                await response.read()
+                if response.status != 200:
+                    errors += 1
+            latencies.append(time.perf_counter() - start)
+
+    connector = aiohttp.TCPConnector(limit=concurrency)
+    async with aiohttp.ClientSession(connector=connector) as session:
+        start = time.perf_counter()
+        await asyncio.gather(*(worker(session) for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    return {
+        "requests": total,
+        "errors": errors,
+        "seconds": elapsed,
+        "rps": total / elapsed,
+        "p50_ms": statistics.median(latencies) * 1000,
+        "p95_ms": latencies[int(len(latencies) * 0.95) - 1] * 1000,
+        "p99_ms": latencies[int(len(latencies) * 0.99) - 1] * 1000,
+    }
+
+
+async def main_async(args):
+    runner = None
+    url = args.url
+    if url is None:
+        from api import create_app
+        from natal_cache import NatalCache
+        runner = web.AppRunner(create_app(NatalCache(maxsize=args.cache_size)))
+        await runner.setup()
+        site = web.TCPSite(runner, "127.0.0.1", 0)
+        await site.start()
+        port = runner.addresses[0][1]
+        url = f"http://127.0.0.1:{port}"
+    try:
+        result = await run(url, args.requests, args.concurrency, args.seed)
+    finally:
+        if runner is not None:
+            await runner.cleanup()
+    print(f"{result['requests']} requests in {result['seconds']:.2f}s "
+          f"-> {result['rps']:.0f} req/s ({result['rps'] * 60:.0f}/min), errors={result['errors']}")
+    print(f"latency p50={result['p50_ms']:.2f}ms p95={result['p95_ms']:.2f}ms p99={result['p99_ms']:.2f}ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="JSON API throughput benchmark")
+    parser.add_argument("--url", default=None, help="既存のサーバー（省略時はプロセス内で起動）")
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--cache-size", type=int, default=1024)
+    parser.add_argument("--seed", type=int, default=1)
+    asyncio.run(main_async(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
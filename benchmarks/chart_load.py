@@ -0,0 +1,126 @@
+# --- ⏱️ 星の計算サービスの負荷試験 ---
+# 同時に分析するセッション（スレッド）を --sessions 個起こし、chart_service.ChartService に
+# 同じ出生データの組を（セッションごとに順番を変えて）計算させる。ワーカー数ごとに
+#   - 1秒あたりの計算件数・1回の待ち時間
+#   - 混雑（ChartServiceBusy）で断られて待ち直した回数
+#   - このプロセスで直接計算した結果と違うものの件数（0 でなければ終了コード 1）
+# を表示する。ワーカー数 0 は呼び出し元のスレッドで計算する場合（比較用）。
+#   python benchmarks/chart_load.py [--sessions 50] [--charts 40] [--batch 1] [--workers 0,1,2,4]
+import argparse
+import os
+import random
+import statistics
+import sys
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+os.environ.setdefault("AROMA_EPHE_MODE", "bundled")
+
+from chart_service import ChartService, ChartServiceBusy
+from content import PREFECTURES
+from ephemeris import ensure_ephemeris
+from scoring import compute_natal
+
+
+def random_births(count, seed):
+    rng = random.Random(seed)
+    return [
+        (rng.randint(1950, 2025), rng.randint(1, 12), rng.randint(1, 28),
+         rng.randint(0, 23), rng.randint(0, 59), rng.choice(list(PREFECTURES)))
+        for _ in range(count)
+    ]
+
+
+def run(service, births, expected, sessions, batch):
+    latencies = []
+    retries = [0]
+    mismatches = [0]
+    lock = threading.Lock()
+    barrier = threading.Barrier(sessions + 1)
+
+    def session(index):
+        order = list(range(len(births)))
+        random.Random(index).shuffle(order)
+        own_latencies, own_retries, own_mismatches = [], 0, 0
+        barrier.wait()
+        for first in range(0, len(order), batch):
+            chunk = order[first:first + batch]
+            start = time.perf_counter()
+            while True:
+                try:
+                    results = service.natal_many([births[i] for i in chunk])
+                    break
+                except ChartServiceBusy:
+                    own_retries += 1
+                    time.sleep(0.005)
+            own_latencies.append(time.perf_counter() - start)
+            own_mismatches += sum(result != expected[i] for i, result in zip(chunk, results))
+        with lock:
+            latencies.extend(own_latencies)
+            retries[0] += own_retries
+            mismatches[0] += own_mismatches
+
+    threads = [threading.Thread(target=session, args=(i,)) for i in range(sessions)]
+    for thread in threads:
+        thread.start()
+    barrier.wait()
+    start = time.perf_counter()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    return {
+        "charts": sessions * len(births),
+        "seconds": elapsed,
+        "charts_per_s": sessions * len(births) / elapsed,
+        "p50_ms": statistics.median(latencies) * 1000,
+        "p95_ms": latencies[int(len(latencies) * 0.95) - 1] * 1000,
+        "retries": retries[0],
+        "mismatches": mismatches[0],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Chart service load test")
+    parser.add_argument("--sessions", type=int, default=50)
+    parser.add_argument("--charts", type=int, default=40, help="1セッションあたりの計算件数")
+    parser.add_argument("--batch", type=int, default=1, help="1回に頼む件数（グループの分析なら参加者数）")
+    parser.add_argument("--workers", default=None, help="試すワーカー数（カンマ区切り、既定: 0 と 1 から CPU 数まで倍々）")
+    parser.add_argument("--queue", type=int, default=32)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    if args.workers:
+        worker_counts = [int(n) for n in args.workers.split(",")]
+    else:
+        worker_counts = [0, 1]
+        while worker_counts[-1] * 2 <= (os.cpu_count() or 1):
+            worker_counts.append(worker_counts[-1] * 2)
+
+    ephe_dir = ensure_ephemeris()
+    births = random_births(args.charts, args.seed)
+    expected = [compute_natal(*birth) for birth in births]
+    print(f"{args.sessions} sessions x {args.charts} charts (batch {args.batch}), cpu_count={os.cpu_count()}")
+
+    failed = False
+    for workers in worker_counts:
+        # キャッシュは使わない（毎回ワーカーで計算させる）
+        service = ChartService(ephe_dir, workers=workers, max_pending=args.queue, timeout=60)
+        if workers:
+            service.natal_many(births[:workers])
+        result = run(service, births, expected, args.sessions, args.batch)
+        service.shutdown()
+        print(f"workers={workers}: {result['charts_per_s']:>8.0f} charts/s  "
+              f"p50={result['p50_ms']:.2f}ms p95={result['p95_ms']:.2f}ms  "
+              f"busy retries={result['retries']}  mismatches={result['mismatches']}")
+        failed = failed or result["mismatches"] > 0
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,435 @@
+# --- ⏱️ ベンチマーク一式 ---
+# 起動・最初の表示・天体暦の確認・星の計算・香りの計算・グラフ作成・アプリ全体の実行を段階ごとに計る。
+# flatlib 同梱の天体暦を使うのでネットワーク不要。
+#
+#   python benchmarks/run.py --output results.json
+#   python benchmarks/run.py --baseline results.json --threshold 0.25 [--stage-threshold app_run=0.5]
+#   python benchmarks/run.py --only natal_engine,scent_scoring
+#
+# --baseline を指定すると、中央値が基準値より threshold（割合）以上遅くなった段階があれば
+# 終了コード 1 で終わる。
+import argparse
+import csv
+import io
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# オフラインで動かす（同梱の天体暦、ディスクキャッシュ・履歴の保存なし）
+os.environ.setdefault("AROMA_EPHE_MODE", "bundled")
+os.environ.setdefault("AROMA_NATAL_CACHE_DB", "")
+os.environ.setdefault("AROMA_HISTORY_DB", "")
+os.environ.setdefault("AROMA_LOG_LEVEL", "WARNING")
+
+STAGES = OrderedDict()
+
+
+def stage(name):
+    def register(func):
+        STAGES[name] = func
+        return func
+    return register
+
+
+def measure(func, number, repeat):
+    # number 回の呼び出しを repeat 回計り、1回あたりの秒数のリストを返す
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        samples.append((time.perf_counter() - start) / number)
+    return samples
+
+
+def random_births(count, seed=1):
+    rng = random.Random(seed)
+    jst = timezone(timedelta(hours=9))
+    start = datetime(1950, 1, 1, tzinfo=jst)
+    span = int((datetime(2026, 1, 1, tzinfo=jst) - start).total_seconds() // 60)
+    return [start + timedelta(minutes=rng.randrange(span)) for _ in range(count)]
+
+
+def participants_csv(count, seed=1):
+    # グループ・一括処理用の CSV（出生地は東京都、香りの順位はランダムな並べ替え）
+    from group import CSV_FIELDS
+
+    rng = random.Random(seed)
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    writer.writerow(CSV_FIELDS)
+    for i, dt in enumerate(random_births(count, seed)):
+        ranks = list(range(1, 9))
+        rng.shuffle(ranks)
+        writer.writerow([f"p{i}", dt.year, dt.month, dt.day, dt.hour, dt.minute, "東京都"] + ranks)
+    return buf.getvalue()
+
+
+def cycle(items):
+    index = [0]
+
+    def next_item():
+        item = items[index[0] % len(items)]
+        index[0] += 1
+        return item
+    return next_item
+
+
+# --- 段階 ---
+@stage("cold_import")
+def bench_cold_import(quick):
+    # 新しいインタプリタで app.py を import するまで（Python 自体の起動時間を含む）
+    samples = []
+    for _ in range(3 if quick else 7):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, "-c", "import app"], cwd=ROOT, check=True,
+                       stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+# 新しいインタプリタで streamlit を import し、入力画面（サイドバーのフォーム）を描き終えるまで。
+# 重いモジュール（pandas・swisseph・reportlab など）は最初の分析まで読み込まないので、ここには入らない。
+FIRST_PAINT_SCRIPT = """
+import sys, time
+start = time.perf_counter()
+from streamlit.testing.v1 import AppTest
+at = AppTest.from_file(sys.argv[1], default_timeout=120)
+at.run()
+if at.exception or not at.sidebar.button:
+    sys.exit("app did not draw the input form")
+print(time.perf_counter() - start)
+"""
+
+
+@stage("first_paint")
+def bench_first_paint(quick):
+    samples = []
+    for _ in range(3 if quick else 7):
+        result = subprocess.run([sys.executable, "-c", FIRST_PAINT_SCRIPT, os.path.join(ROOT, "app.py")],
+                                cwd=ROOT, check=True, capture_output=True, text=True)
+        samples.append(float(result.stdout.strip().splitlines()[-1]))
+    return samples
+
+
+@stage("ephemeris_present")
+def bench_ephemeris_present(quick):
+    # download_ephemeris() 相当の処理（ファイルは既にある）: 存在確認とパス設定
+    import ephemeris
+    ephe_dir = ephemeris.bundled_dir()
+    return measure(lambda: ephemeris.provision(ephe_dir, "offline"), 200, 5 if quick else 15)
+
+
+@stage("chart_flatlib")
+def bench_chart_flatlib(quick):
+    # 以前の方式: flatlib の Chart を作ってから12点のサインを取り出して集計する
+    import ephemeris
+    from flatlib import const
+    from flatlib.chart import Chart
+    from flatlib.datetime import Datetime
+    from flatlib.geopos import GeoPos
+    from astro import PLANET_SCORES
+    from scoring import get_element
+
+    ephemeris.ensure_ephemeris()
+    ids = [(const.SUN, "Sun"), (const.MOON, "Moon"), (const.MERCURY, "Mercury"), (const.VENUS, "Venus"),
+           (const.MARS, "Mars"), (const.JUPITER, "Jupiter"), (const.SATURN, "Saturn"),
+           (const.URANUS, "Uranus"), (const.NEPTUNE, "Neptune"), (const.PLUTO, "Pluto"),
+           (const.ASC, "Asc"), (const.MC, "Mc")]
+    births = cycle(random_births(500))
+
+    def run():
+        birth = births()
+        date = Datetime(birth.strftime("%Y/%m/%d"), birth.strftime("%H:%M"), "+09:00")
+        chart = Chart(date, GeoPos(35.68, 139.69), IDs=const.LIST_OBJECTS)
+        scores = {"Fire": 0, "Earth": 0, "Air": 0, "Water": 0}
+        for body_id, name in ids:
+            scores[get_element(chart.get(body_id).sign)] += PLANET_SCORES[name]
+        return scores
+    return measure(run, 50, 5 if quick else 15)
+
+
+@stage("natal_engine")
+def bench_natal_engine(quick):
+    # 現在の方式: astro.compute_element_scores（イングレス表 + swisseph）
+    import ephemeris
+    from astro import compute_element_scores
+
+    ephemeris.ensure_ephemeris()
+    births = cycle(random_births(500))
+    return measure(lambda: compute_element_scores(births(), 35.68, 139.69), 200, 5 if quick else 15)
+
+
+@stage("gazetteer_load")
+def bench_gazetteer_load(quick):
+    # data/gazetteer.bin の読み込みと索引の構築
+    from gazetteer import GAZETTEER_PATH, read_gazetteer
+
+    return measure(lambda: read_gazetteer(GAZETTEER_PATH), 5, 5 if quick else 15)
+
+
+@stage("place_search")
+def bench_place_search(quick):
+    # 出生地の入力補完（前方一致）と、座標から最も近い市区町村
+    from gazetteer import load_gazetteer
+
+    gazetteer = load_gazetteer()
+    queries = cycle(["し", "さっぽろ", "ｼﾝｼﾞｭｸ", "中央区", "北海道", "なは", "よなぐに", "横浜市"])
+    points = cycle([(35.69, 139.69), (43.06, 141.35), (26.21, 127.68), (33.59, 130.40), (36.56, 139.88)])
+
+    def run():
+        gazetteer.search(queries())
+        gazetteer.nearest(*points())
+    return measure(run, 500, 5 if quick else 15)
+
+
+@stage("timeline_cold")
+def bench_timeline_cold(quick):
+    # 星の流れ: 1年分を1時間ごと（8,760点）。ブロックのキャッシュを毎回捨てる
+    import ephemeris
+    import timeline
+    from scoring import JAPAN_TZ
+
+    ephemeris.ensure_ephemeris()
+    start = datetime(2026, 1, 1, tzinfo=JAPAN_TZ)
+    end = datetime(2026, 12, 31, 23, tzinfo=JAPAN_TZ)
+
+    def run():
+        timeline.block_ingresses.cache_clear()
+        for _ in timeline.timeline_chunks(start, end, 1):
+            pass
+    return measure(run, 1, 3 if quick else 7)
+
+
+@stage("timeline_cached")
+def bench_timeline_cached(quick):
+    # 同じ1年分を、他の人が計算済み（ブロックのキャッシュあり）の状態で
+    import ephemeris
+    import timeline
+    from scoring import JAPAN_TZ
+
+    ephemeris.ensure_ephemeris()
+    start = datetime(2026, 1, 1, tzinfo=JAPAN_TZ)
+    end = datetime(2026, 12, 31, 23, tzinfo=JAPAN_TZ)
+
+    def run():
+        for _ in timeline.timeline_chunks(start, end, 1):
+            pass
+    run()
+    return measure(run, 5, 5 if quick else 15)
+
+
+@stage("scent_scoring")
+def bench_scent_scoring(quick):
+    # 香りのスコアと好き/苦手の選択（同点処理を含む）
+    from content import SCENTS_CONF
+    from scoring import compute_scent
+
+    rng = random.Random(1)
+    rankings = []
+    for _ in range(500):
+        ranks = list(range(1, 9))
+        rng.shuffle(ranks)
+        rankings.append({scent["key"]: rank for scent, rank in zip(SCENTS_CONF, ranks)})
+    rankings = cycle(rankings)
+    return measure(lambda: compute_scent(rankings()), 1000, 5 if quick else 15)
+
+
+@stage("plotly_build")
+def bench_plotly_build(quick):
+    # キャッシュなしで円グラフを作ってシリアライズする
+    import plotly.io as pio
+    from charts import build_pie_figure
+
+    def run():
+        fig = build_pie_figure([8, 17, 8, 3], [4, 15, 6, 11])
+        pio.to_json(fig, validate=False)
+    return measure(run, 10, 5 if quick else 15)
+
+
+@stage("plotly_cached")
+def bench_plotly_cached(quick):
+    from charts import FigureCache
+
+    cache = FigureCache()
+    cache.get([8, 17, 8, 3], [4, 15, 6, 11])
+    return measure(lambda: cache.get([8, 17, 8, 3], [4, 15, 6, 11]), 1000, 5 if quick else 15)
+
+
+@stage("history_page")
+def bench_history_page(quick):
+    # 30万件（--quick では5万件）の履歴から、1人のお客様の古いページ（10件）を索引で引く
+    from history import HistoryStore
+
+    rows = 50_000 if quick else 300_000
+    clients = 2_000
+    with tempfile.TemporaryDirectory() as tmp:
+        store = HistoryStore(os.path.join(tmp, "history.sqlite3"))
+        with store._db:
+            store._db.executemany(
+                "INSERT INTO clients (id, name, birth, natal_version, signs, created_at) VALUES (?, ?, ?, 1, ?, 0)",
+                ((i, f"client{i}", "1990/01/01 12:00|東京都", "0123456789ab") for i in range(1, clients + 1)),
+            )
+            store._db.executemany(
+                "INSERT INTO analyses (client_id, created_at, ranks, core, like_elem, dislike_elem)"
+                " VALUES (?, ?, '12345678', 0, 1, 2)",
+                ((i % clients + 1, i) for i in range(rows)),
+            )
+        client_id = clients // 2
+        cursor = store.sessions(client_id, limit=rows // clients // 2)[-1]["id"]
+        samples = measure(lambda: store.sessions(client_id, limit=10, before=cursor), 200, 5 if quick else 15)
+        store._db.close()
+    return samples
+
+
+@stage("group_matrix")
+def bench_group_matrix(quick):
+    # 200人の CSV の読み込み・全員の分析・星/香りの相性行列（N×N）まで
+    import ephemeris
+    from group import analyze_group, astro_profile, compatibility_matrix, parse_participants, scent_profile
+    from natal_cache import NatalCache
+
+    text = participants_csv(200)
+    ephemeris.ensure_ephemeris()
+    natal_cache = NatalCache()
+
+    def run():
+        participants, _ = parse_participants(text)
+        group = analyze_group(participants, natal_cache=natal_cache)
+        compatibility_matrix(astro_profile(group))
+        compatibility_matrix(scent_profile(group))
+    return measure(run, 3, 3 if quick else 7)
+
+
+@stage("bulk_csv")
+def bench_bulk_csv(quick):
+    # 2,000行の CSV の一括処理（読み込み・確認・分析・結果の書き出し）。星の計算はこのプロセスで行う
+    import ephemeris
+    from bulk import process_csv
+    from chart_service import ChartService
+
+    text = participants_csv(2000)
+    chart_service = ChartService(ephemeris.ensure_ephemeris(), workers=0)
+
+    def run():
+        for _ in process_csv(io.StringIO(text), chart_service.natal_many, io.StringIO()):
+            pass
+    return measure(run, 1, 3 if quick else 7)
+
+
+@stage("app_run")
+def bench_app_run(quick):
+    # Streamlit のテスト用ハーネスで main() を実行し、「分析する」を押して結果が出るまで
+    from streamlit.testing.v1 import AppTest
+
+    samples = []
+    for _ in range(3 if quick else 7):
+        start = time.perf_counter()
+        at = AppTest.from_file(os.path.join(ROOT, "app.py"), default_timeout=120)
+        at.run()
+        at.sidebar.button[0].click().run()
+        if at.exception or at.error:
+            raise RuntimeError(f"app run failed: {at.exception or [e.value for e in at.error]}")
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+# --- 実行と比較 ---
+def summarize(samples):
+    ordered = sorted(samples)
+    return {
+        "median_ms": statistics.median(ordered) * 1000,
+        "min_ms": ordered[0] * 1000,
+        "p95_ms": ordered[max(0, int(round(len(ordered) * 0.95)) - 1)] * 1000,
+        "samples": len(ordered),
+    }
+
+
+def compare(results, baseline, threshold, stage_thresholds):
+    regressions = []
+    for name, result in results["stages"].items():
+        base = baseline.get("stages", {}).get(name)
+        if base is None:
+            continue
+        limit = stage_thresholds.get(name, threshold)
+        ratio = result["median_ms"] / base["median_ms"] - 1.0
+        status = "REGRESSION" if ratio > limit else "ok"
+        print(f"  {name:<18} {base['median_ms']:>10.4f} -> {result['median_ms']:>10.4f} ms "
+              f"({ratio:+.1%}, limit {limit:+.0%}) {status}")
+        if ratio > limit:
+            regressions.append(name)
+    return regressions
+
+
+def parse_stage_thresholds(values):
+    thresholds = {}
+    for value in values:
+        name, _, limit = value.partition("=")
+        if name not in STAGES or not limit:
+            raise SystemExit(f"invalid --stage-threshold: {value}")
+        thresholds[name] = float(limit)
+    return thresholds
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Aroma Soul Navigation benchmarks")
+    parser.add_argument("--output", help="結果を書き出す JSON ファイル")
+    parser.add_argument("--baseline", help="比較する基準の JSON ファイル")
+    parser.add_argument("--threshold", type=float, default=0.25,
+                        help="許容する中央値の悪化（割合、既定 0.25 = 25%%）")
+    parser.add_argument("--stage-threshold", action="append", default=[],
+                        help="段階ごとの許容値（例: app_run=0.5）")
+    parser.add_argument("--only", help="実行する段階（カンマ区切り）")
+    parser.add_argument("--quick", action="store_true", help="繰り返し回数を減らす")
+    args = parser.parse_args()
+
+    names = list(STAGES)
+    if args.only:
+        names = [name.strip() for name in args.only.split(",")]
+        unknown = [name for name in names if name not in STAGES]
+        if unknown:
+            raise SystemExit(f"unknown stages: {', '.join(unknown)} (available: {', '.join(STAGES)})")
+    stage_thresholds = parse_stage_thresholds(args.stage_threshold)
+
+    results = {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+        },
+        "stages": OrderedDict(),
+    }
+    for name in names:
+        summary = summarize(STAGES[name](args.quick))
+        results["stages"][name] = summary
+        print(f"{name:<18} median {summary['median_ms']:>10.4f} ms  "
+              f"min {summary['min_ms']:>10.4f} ms  (n={summary['samples']})")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2, ensure_ascii=False)
+        print(f"wrote {args.output}")
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        print(f"compared with {args.baseline}:")
+        regressions = compare(results, baseline, args.threshold, stage_thresholds)
+        if regressions:
+            print(f"regressed: {', '.join(regressions)}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+# --- 📦 一括処理（CSV の取り込み・書き出し） ---
+# 提携サロンから届く数千行の CSV（グループモードと同じ列）を、先頭から CHUNK_ROWS 行ずつ読み、
+# 1行ずつ確かめてから、まとめて星の計算（chart_service のワーカー）と香りの計算を行い、
+# 結果の CSV を書き出す。ファイル全体を読み込まないので、行数が増えても使うメモリは変わらない。
+# 読めなかった行も、理由を error 列に入れて結果に残す。
+import csv
+from itertools import islice
+
+from chart_service import ChartServiceBusy, ChartServiceTimeout
+from content import ELEMENT_JP, ELEMENT_KEYS, OIL_NAMES
+from group import CSV_FIELDS, parse_participant
+from scoring import BIRTH_FIELDS, analyze
+
+CHUNK_ROWS = 500
+RESULT_FIELDS = (
+    ("line", "name") + tuple(BIRTH_FIELDS) + ("place",)
+    + tuple(f"astro_{k}" for k in ELEMENT_KEYS) + tuple(f"scent_{k}" for k in ELEMENT_KEYS)
+    + ("core", "like", "dislike", "like_oils", "dislike_oils", "error")
+)
+
+
+def process_csv(lines, natal_many, output, chunk_rows=CHUNK_ROWS):
+    # lines: CSV の行（テキストのファイルオブジェクトなど）
+    # natal_many: 出生データのリスト → {"signs", "astro_scores"} のリスト（ChartService.natal_many）
+    # output: 結果を書くテキストのファイルオブジェクト
+    # チャンクを書き終えるたびに (処理した行数, エラーの行数) を返す
+    reader = csv.DictReader(lines)
+    # 都道府県しか書かない表計算ソフトのひな形に合わせ、prefecture 列も出生地として読む
+    fieldnames = ["place" if name == "prefecture" else name for name in reader.fieldnames or ()]
+    missing = [field for field in CSV_FIELDS if field not in fieldnames]
+    if missing:
+        raise ValueError(f"missing columns: {', '.join(missing)}")
+    reader.fieldnames = fieldnames
+
+    writer = csv.writer(output)
+    writer.writerow(RESULT_FIELDS)
+    rows = errors = 0
+    while True:
+        chunk = []
+        for row in islice(reader, chunk_rows):
+            try:
+                chunk.append((reader.line_num, row, parse_participant(row), None))
+            except ValueError as e:
+                chunk.append((reader.line_num, row, None, str(e)))
+        if not chunk:
+            return
+        valid = [participant for _, _, participant, _ in chunk if participant is not None]
+        natals = iter(_natals(natal_many, [participant["birth"] for participant in valid]))
+        for line, row, participant, error in chunk:
+            if participant is not None:
+                try:
+                    writer.writerow(_result_row(line, participant, next(natals)))
+                    continue
+                except Exception as e:
+                    error = f"{type(e).__name__}: {e}"
+            echo = [line, row.get("name")] + [row.get(field) for field in BIRTH_FIELDS] + [row.get("place")]
+            writer.writerow(echo + [""] * (len(RESULT_FIELDS) - len(echo) - 1) + [error])
+            errors += 1
+        rows += len(chunk)
+        yield rows, errors
+
+
+def _natals(natal_many, births):
+    # チャンクをまとめて計算し、失敗したら1行ずつ計算し直して、失敗した行だけを例外にする。
+    # 混雑・時間切れは行のせいではないので、そのまま呼び出し側に返す
+    try:
+        return natal_many(births)
+    except (ChartServiceBusy, ChartServiceTimeout):
+        raise
+    except Exception:
+        pass
+    natals = []
+    for birth in births:
+        try:
+            natals.append(natal_many([birth])[0])
+        except (ChartServiceBusy, ChartServiceTimeout):
+            raise
+        except Exception as e:
+            natals.append(e)
+    return natals
+
+
+def _result_row(line, participant, natal):
+    if isinstance(natal, Exception):
+        raise natal
+    analysis = analyze(participant["birth"], participant["scent_ranks"], natal=natal)
+    return ([line, participant["name"]] + list(participant["birth"])
+            + [analysis["astro_scores"][k] for k in ELEMENT_KEYS]
+            + [analysis["scent_scores"][k] for k in ELEMENT_KEYS]
+            + [ELEMENT_JP[analysis[k]] for k in ("core", "like", "dislike")]
+            + [OIL_NAMES[analysis["like"]], OIL_NAMES[analysis["dislike"]], ""])
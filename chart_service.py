@@ -0,0 +1,211 @@
+# --- 🪐 星の計算サービス（プロセスプール） ---
+# swisseph は天体暦のパスやファイルハンドル・内部キャッシュをプロセス全体で共有していて、
+# Streamlit のセッション（スレッド）から同時に呼ぶと状態を取り合い、計算中は GIL も取り合う。
+# そこで星の計算は別プロセスのワーカーで行う。
+#   - ワーカーは起動時に1回だけ天体暦のパス設定とイングレス表・市区町村データの読み込みを行う
+#   - 受け付け中（待ち + 計算中）の件数に上限を設け、一杯なら ChartServiceBusy ですぐに断る
+#   - 結果を待つのは timeout 秒まで。過ぎたら ChartServiceTimeout
+#   - NatalCache は呼び出し側のプロセスに置き、キャッシュに無いものだけをワーカーに送る
+#
+# 環境変数:
+#   AROMA_CHART_WORKERS  ワーカー数（既定: CPU 数、最大 4）。0 なら呼び出し元のスレッドで計算する
+#   AROMA_CHART_QUEUE    受け付け中の件数の上限（既定: 32）
+#   AROMA_CHART_TIMEOUT  結果を待つ秒数（既定: 10）
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, TimeoutError
+from concurrent.futures.process import BrokenProcessPool
+
+from scoring import compute_natal, natal_key
+
+# 1回に1ワーカーへ送る件数の上限（グループの計算をワーカー間で分けるため）
+CHUNK_SIZE = 64
+
+
+class ChartServiceError(Exception):
+    pass
+
+
+class ChartServiceBusy(ChartServiceError):
+    pass
+
+
+class ChartServiceTimeout(ChartServiceError):
+    pass
+
+
+def _init_worker(ephe_dir):
+    # 親プロセスで準備済みの天体暦のディレクトリを使う（ワーカーではダウンロードしない）
+    from astro import load_ingress
+    from ephemeris import ensure_ephemeris
+    from gazetteer import load_gazetteer
+
+    ensure_ephemeris(ephe_dir, mode="offline")
+    load_ingress()
+    load_gazetteer()
+
+
+def _compute(births):
+    return [compute_natal(*birth) for birth in births]
+
+
+def _ping():
+    return os.getpid()
+
+
+class ChartService:
+    def __init__(self, ephe_dir, workers=2, max_pending=32, timeout=10.0, natal_cache=None):
+        self.ephe_dir = ephe_dir
+        self.workers = workers
+        self.max_pending = max_pending
+        self.timeout = timeout
+        self.natal_cache = natal_cache
+        self.submitted = 0
+        self.completed = 0
+        self.busy = 0
+        self.timeouts = 0
+        self.restarts = 0
+        self._pending = 0
+        self._lock = threading.Lock()
+        self._pool = None
+
+    @classmethod
+    def from_env(cls, ephe_dir, natal_cache=None):
+        workers = os.environ.get("AROMA_CHART_WORKERS")
+        return cls(
+            ephe_dir,
+            workers=int(workers) if workers else min(4, os.cpu_count() or 1),
+            max_pending=int(os.environ.get("AROMA_CHART_QUEUE", "32")),
+            timeout=float(os.environ.get("AROMA_CHART_TIMEOUT", "10")),
+            natal_cache=natal_cache,
+        )
+
+    def _new_pool(self):
+        # Streamlit のプロセスはスレッドだらけなので fork せず spawn で起動する
+        return ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(self.ephe_dir,),
+        )
+
+    def start(self):
+        # ワーカーを先に起動しておく（最初の分析で起動を待たせない）。返り値は待たない
+        if self.workers > 0:
+            with self._lock:
+                if self._pool is None:
+                    self._pool = self._new_pool()
+                pool = self._pool
+            for _ in range(self.workers):
+                pool.submit(_ping)
+
+    def natal(self, birth, timeout=None):
+        # birth: (年, 月, 日, 時, 分, 出生地) → {"signs", "astro_scores"}
+        return self.natal_many([birth], timeout=timeout)[0]
+
+    def natal_many(self, births, timeout=None, use_cache=True):
+        # まとめて計算する（キャッシュに無いものだけをワーカーに分けて送る）。順番は births のまま
+        # use_cache=False なら NatalCache を読みも書きもしない（一括処理で画面用のキャッシュを押し出さないため）
+        natal_cache = self.natal_cache if use_cache else None
+        results = [None] * len(births)
+        keys = [None] * len(births)
+        missing = []
+        for i, birth in enumerate(births):
+            if natal_cache is not None:
+                keys[i] = natal_key(*birth)
+                results[i] = natal_cache.get(keys[i])
+            if results[i] is None:
+                missing.append(i)
+        if not missing:
+            return results
+
+        if self.workers <= 0:
+            computed = _compute([births[i] for i in missing])
+        else:
+            computed = self._run([births[i] for i in missing], self.timeout if timeout is None else timeout)
+        for i, natal in zip(missing, computed):
+            if natal_cache is not None:
+                natal = natal_cache.put(keys[i], natal["signs"], natal["astro_scores"])
+            results[i] = natal
+        return results
+
+    def _run(self, births, timeout):
+        deadline = time.monotonic() + timeout
+        size = min(CHUNK_SIZE, -(-len(births) // self.workers))
+        chunks = [births[i:i + size] for i in range(0, len(births), size)]
+        futures = self._submit(chunks)
+        computed = []
+        try:
+            for future in futures:
+                computed += future.result(timeout=max(0.0, deadline - time.monotonic()))
+        except TimeoutError:
+            with self._lock:
+                self.timeouts += 1
+            raise ChartServiceTimeout(f"chart computation did not finish within {timeout:g}s") from None
+        except BrokenProcessPool:
+            self._restart()
+            raise ChartServiceError("chart worker stopped unexpectedly") from None
+        finally:
+            # 待つのをやめた分は、まだ始まっていなければ取り消す（受け付け中の枠は終わった時点で返る）
+            for future in futures:
+                future.cancel()
+        return computed
+
+    def _submit(self, chunks):
+        with self._lock:
+            if self._pending + len(chunks) > self.max_pending:
+                self.busy += 1
+                raise ChartServiceBusy("chart service queue is full")
+            if self._pool is None:
+                self._pool = self._new_pool()
+            futures = []
+            for chunk in chunks:
+                try:
+                    future = self._pool.submit(_compute, chunk)
+                except BrokenProcessPool:
+                    # ワーカーが落ちていたら作り直す
+                    self._pool.shutdown(wait=False, cancel_futures=True)
+                    self._pool = self._new_pool()
+                    self.restarts += 1
+                    future = self._pool.submit(_compute, chunk)
+                self._pending += 1
+                self.submitted += 1
+                futures.append(future)
+        # 終わっていればその場で呼ばれるので、ロックの外で登録する
+        for future in futures:
+            future.add_done_callback(self._finish)
+        return futures
+
+    def _finish(self, future):
+        with self._lock:
+            self._pending -= 1
+            if not future.cancelled() and future.exception() is None:
+                self.completed += 1
+
+    def _restart(self):
+        with self._lock:
+            if self._pool is not None:
+                self._pool.shutdown(wait=False, cancel_futures=True)
+                self._pool = None
+                self.restarts += 1
+
+    def shutdown(self):
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "pending": self._pending,
+                "max_pending": self.max_pending,
+                "submitted": self.submitted,
+                "completed": self.completed,
+                "busy": self.busy,
+                "timeouts": self.timeouts,
+                "restarts": self.restarts,
+            }
@@ -0,0 +1,154 @@
+# --- 📊 エレメントの円グラフ ---
+# 星のスコアは PLANET_SCORES の和、香りのスコアは順位 1〜8 の和なので、取りうる値の組は多くない。
+# 組み合わせごとに一度だけ図を作り、LRU で保持する。
+# 印刷や低速端末向けに、plotly.js を使わない軽量な SVG 版も用意する。
+# plotly は図を作るときに初めて import する（入力画面の表示を待たせないため）。
+import math
+import threading
+from collections import OrderedDict
+from html import escape
+
+from content import COLORS, ELEMENT_JP, ELEMENT_KEYS
+
+SUBPLOT_TITLES = ('星 (先天的)', '香り (現在)')
+
+
+def build_pie_figure(astro_values, scent_values):
+    import plotly.graph_objects as go
+    from plotly.subplots import make_subplots
+
+    labels_list = [ELEMENT_JP[k] for k in ELEMENT_KEYS]
+    colors_list = [COLORS[k] for k in ELEMENT_KEYS]
+
+    fig = make_subplots(rows=1, cols=2, specs=[[{'type':'domain'}, {'type':'domain'}]],
+                        subplot_titles=[f'<b>{title}</b>' for title in SUBPLOT_TITLES])
+    fig.add_trace(go.Pie(labels=labels_list, values=list(astro_values), marker_colors=colors_list, hole=.4, showlegend=False), 1, 1)
+    fig.add_trace(go.Pie(labels=labels_list, values=list(scent_values), marker_colors=colors_list, hole=.4, showlegend=False), 1, 2)
+    fig.update_layout(margin=dict(t=20, b=0, l=0, r=0))
+    return fig
+
+
+def build_timeline_figure(astro_values, times, scores):
+    # 左に本人の星の円グラフ、右に期間中の空のエレメントバランス（割合の積み上げ）
+    # scores: (時刻の数, 4) の ELEMENT_KEYS 順のスコア
+    import plotly.graph_objects as go
+    from plotly.subplots import make_subplots
+
+    labels_list = [ELEMENT_JP[k] for k in ELEMENT_KEYS]
+    colors_list = [COLORS[k] for k in ELEMENT_KEYS]
+
+    fig = make_subplots(rows=1, cols=2, specs=[[{'type':'domain'}, {'type':'xy'}]], column_widths=[0.3, 0.7],
+                        subplot_titles=[f'<b>{SUBPLOT_TITLES[0]}</b>', '<b>星の流れ (トランジット)</b>'])
+    fig.add_trace(go.Pie(labels=labels_list, values=list(astro_values), marker_colors=colors_list, hole=.4, showlegend=False), 1, 1)
+    for j, key in enumerate(ELEMENT_KEYS):
+        fig.add_trace(go.Scatter(x=times, y=scores[:, j], name=labels_list[j], mode='lines',
+                                 line=dict(width=0.5, color=colors_list[j]), stackgroup='sky', groupnorm='percent',
+                                 hovertemplate='%{x|%Y/%m/%d %H:%M}<br>%{y}点'), 1, 2)
+    fig.update_yaxes(range=[0, 100], ticksuffix='%', row=1, col=2)
+    fig.update_layout(margin=dict(t=30, b=0, l=0, r=0), legend=dict(orientation='h', y=-0.15))
+    return fig
+
+
+def build_compatibility_heatmap(names, matrix):
+    # グループの相性（0〜100）。人数が少ないときだけマスに数字を出す
+    import plotly.graph_objects as go
+
+    fig = go.Figure(go.Heatmap(
+        z=matrix, x=list(names), y=list(names), zmin=0, zmax=100, colorscale='RdYlGn',
+        text=matrix.round(0) if len(names) <= 30 else None, texttemplate='%{text}' if len(names) <= 30 else None,
+        hovertemplate='%{y} × %{x}<br>%{z:.1f}<extra></extra>',
+    ))
+    fig.update_yaxes(autorange='reversed')
+    fig.update_layout(margin=dict(t=20, b=0, l=0, r=0), height=min(1200, 200 + 18 * len(names)))
+    return fig
+
+
+class FigureCache:
+    def __init__(self, maxsize=256):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._lru = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, astro_values, scent_values):
+        # キーは ELEMENT_KEYS 順の値のタプル。値は {"figure": Figure}（シリアライズは st.plotly_chart が行う）
+        key = (tuple(astro_values), tuple(scent_values))
+        with self._lock:
+            entry = self._lru.get(key)
+            if entry is not None:
+                self._lru.move_to_end(key)
+                self.hits += 1
+                return entry
+            self.misses += 1
+
+        entry = {"figure": build_pie_figure(*key)}
+        with self._lock:
+            self._lru[key] = entry
+            while len(self._lru) > self.maxsize:
+                self._lru.popitem(last=False)
+        return entry
+
+    def stats(self):
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses,
+                    "size": len(self._lru), "maxsize": self.maxsize}
+
+
+# --- 🖨️ SVG 版（静的） ---
+def _donut_svg(cx, cy, values, r_outer=80, r_inner=32):
+    total = sum(values)
+    parts = []
+    if total <= 0:
+        return parts
+    # 画面の円グラフ（Plotly の既定）と同じく、値の大きい順に12時の位置から反時計回りに並べる
+    slices = sorted(
+        ((v, k) for k, v in zip(ELEMENT_KEYS, values) if v > 0),
+        key=lambda item: -item[0],
+    )
+    start = 0.0
+    for value, key in slices:
+        frac = value / total
+        end = start + frac
+        color = COLORS[key]
+        if frac >= 1.0:
+            parts.append(f'<circle cx="{cx}" cy="{cy}" r="{(r_outer + r_inner) / 2}" fill="none" '
+                         f'stroke="{color}" stroke-width="{r_outer - r_inner}"/>')
+        else:
+            a0, a1 = 2 * math.pi * start, 2 * math.pi * end
+            large = 1 if frac > 0.5 else 0
+            x0o, y0o = cx - r_outer * math.sin(a0), cy - r_outer * math.cos(a0)
+            x1o, y1o = cx - r_outer * math.sin(a1), cy - r_outer * math.cos(a1)
+            x1i, y1i = cx - r_inner * math.sin(a1), cy - r_inner * math.cos(a1)
+            x0i, y0i = cx - r_inner * math.sin(a0), cy - r_inner * math.cos(a0)
+            parts.append(
+                f'<path d="M{x0o:.2f},{y0o:.2f} A{r_outer},{r_outer} 0 {large} 0 {x1o:.2f},{y1o:.2f} '
+                f'L{x1i:.2f},{y1i:.2f} A{r_inner},{r_inner} 0 {large} 1 {x0i:.2f},{y0i:.2f} Z" '
+                f'fill="{color}" stroke="#fff" stroke-width="1"/>'
+            )
+        mid = 2 * math.pi * (start + end) / 2
+        r_text = (r_outer + r_inner) / 2
+        parts.append(
+            f'<text x="{cx - r_text * math.sin(mid):.2f}" y="{cy - r_text * math.cos(mid):.2f}" '
+            f'font-size="11" text-anchor="middle" dominant-baseline="middle">{frac * 100:.1f}%</text>'
+        )
+        start = end
+    return parts
+
+
+def pie_svg(astro_values, scent_values, width=440):
+    height = 250
+    parts = [f'<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 440 {height}" '
+             f'width="{width}" font-family="sans-serif">']
+    for i, (title, values) in enumerate(zip(SUBPLOT_TITLES, (astro_values, scent_values))):
+        cx = 110 + 220 * i
+        parts.append(f'<text x="{cx}" y="16" font-size="14" font-weight="bold" '
+                     f'text-anchor="middle">{escape(title)}</text>')
+        parts.extend(_donut_svg(cx, 110, list(values)))
+    # 凡例（静的な図ではホバー表示が無いため）
+    for i, key in enumerate(ELEMENT_KEYS):
+        x = 10 + 108 * i
+        parts.append(f'<rect x="{x}" y="{height - 26}" width="12" height="12" fill="{COLORS[key]}"/>')
+        parts.append(f'<text x="{x + 16}" y="{height - 16}" font-size="11">{escape(ELEMENT_JP[key])}</text>')
+    parts.append('</svg>')
+    return "".join(parts)
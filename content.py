@@ -0,0 +1,216 @@
+# --- 🌟 辞書データ（表示用の文言・設定） ---
+# Streamlit は操作のたびにスクリプトを再実行するので、文言や設定はモジュールの読み込み時に
+# 一度だけ作り、変更できない形（MappingProxyType / tuple）で共有する。
+from types import MappingProxyType
+
+ELEMENT_KEYS = ("Fire", "Earth", "Air", "Water")
+
+SIGN_JP = MappingProxyType({
+    "Aries": "牡羊座", "Taurus": "牡牛座", "Gemini": "双子座", "Cancer": "蟹座",
+    "Leo": "獅子座", "Virgo": "乙女座", "Libra": "天秤座", "Scorpio": "蠍座",
+    "Sagittarius": "射手座", "Capricorn": "山羊座", "Aquarius": "水瓶座", "Pisces": "魚座"
+})
+
+PREFECTURES = MappingProxyType({
+    "北海道": (43.06, 141.35), "青森県": (40.82, 140.74), "岩手県": (39.70, 141.15),
+    "宮城県": (38.26, 140.87), "秋田県": (39.71, 140.10), "山形県": (38.24, 140.36),
+    "福島県": (37.75, 140.46), "茨城県": (36.34, 140.44), "栃木県": (36.56, 139.88),
+    "群馬県": (36.39, 139.06), "埼玉県": (35.85, 139.64), "千葉県": (35.60, 140.12),
+    "東京都": (35.68, 139.69), "神奈川県": (35.44, 139.64), "新潟県": (37.90, 139.02),
+    "富山県": (36.69, 137.21), "石川県": (36.59, 136.62), "福井県": (36.06, 136.22),
+    "山梨県": (35.66, 138.56), "長野県": (36.65, 138.18), "岐阜県": (35.39, 136.72),
+    "静岡県": (34.97, 138.38), "愛知県": (35.18, 136.90), "三重県": (34.73, 136.50),
+    "滋賀県": (35.00, 135.86), "京都府": (35.02, 135.75), "大阪府": (34.68, 135.52),
+    "兵庫県": (34.69, 135.18), "奈良県": (34.68, 135.80), "和歌山県": (34.22, 135.16),
+    "鳥取県": (35.50, 134.23), "島根県": (35.47, 133.05), "岡山県": (34.66, 133.93),
+    "広島県": (34.39, 132.46), "山口県": (34.18, 131.47), "徳島県": (34.06, 134.55),
+    "香川県": (34.34, 134.04), "愛媛県": (33.84, 132.76), "高知県": (33.55, 133.53),
+    "福岡県": (33.60, 130.41), "佐賀県": (33.24, 130.29), "長崎県": (32.74, 129.87),
+    "熊本県": (32.78, 130.74), "大分県": (33.23, 131.61), "宮崎県": (31.91, 131.42),
+    "鹿児島県": (31.56, 130.55), "沖縄県": (26.21, 127.68)
+})
+
+ELEMENTS = MappingProxyType({
+    "Fire": ("Aries", "Leo", "Sagittarius"),
+    "Earth": ("Taurus", "Virgo", "Capricorn"),
+    "Air": ("Gemini", "Libra", "Aquarius"),
+    "Water": ("Cancer", "Scorpio", "Pisces")
+})
+
+ELEMENT_JP = MappingProxyType({
+    "Fire": "🔥 火 (胆汁質)",
+    "Earth": "🌏 地 (神経質)",
+    "Air": "🌬️ 風 (多血質)",
+    "Water": "💧 水 (リンパ質)"
+})
+
+COLORS = MappingProxyType({
+    'Fire': '#FFCA99', 'Earth': '#A4D65E', 'Air': '#FFACC7', 'Water': '#87CEEB'
+})
+
+OIL_NAMES = MappingProxyType({
+    "Fire": "ローレル、ユーカリ・ラディアタ、オレンジ・スイート",
+    "Earth": "ラベンダー・アングスティフォリア、カモマイル・ローマン、イランイラン",
+    "Air": "ホーウッド、パルマローザ、マジョラム",
+    "Water": "レモングラス、リトセア、ユーカリ・レモン、ローズマリー・カンファー"
+})
+
+BIG3_EXPLANATION = MappingProxyType({
+    "Sun": "あなたがこの世に生まれ持った「魂の核」であり、意識的に目指すべき人生のテーマです。社会の中で輝くための「表の顔」であり、迷った時に立ち返るべきエネルギーの源です。",
+    "Moon": "あなたの無意識、感情、プライベートな素顔を表します。理屈ではなく「快・不快」を感じるセンサーであり、心がリラックスして満たされるために必要な要素です。",
+    "Asc": "他者から見たあなたの第一印象や、無意識に出てしまう行動パターン、生まれ持った資質を表します。「世界への玄関口」とも呼ばれ、あなたが社会と接する際のマスク（仮面）のような役割を持ちます。"
+})
+
+STAR_DEFINITIONS = MappingProxyType({
+    "Fire": """
+    **【🔥 火の気質を多く持つ方の定義】**（胆汁質：牡羊座、獅子座、射手座など）  
+    * **本来の資質:** 「決断力、行動力、情熱、自己信頼」といった火のエレメントを核に持つ、リーダーシップと目標達成能力に優れた資質です。
+    * **美点の活用:** 迷わず目標に向かって進む力があなたの人生を推進します。
+    """,
+    "Earth": """
+    **【🌏 土の気質を持つ方の定義】**（神経質：牡牛座、乙女座、山羊座など）  
+    * **本来の資質:** 「安定性、堅実さ、継続力、現実的な実行力」といった土のエレメントを核に持つ、目標を確実に形にする力と、安心感を生み出す資質です。
+    * **美点の活用:** 現実の基礎を築き、ブレずに物事をやり遂げる力があなたの人生を支えます。
+    """,
+    "Air": """
+    **【🌬️ 風の気質を持つ方の定義】**（多血質：双子座、天秤座、水瓶座など）  
+    * **本来の資質:** 「社交性、柔軟性、好奇心、論理的な思考力」といった風のエレメントを核に持つ、コミュニケーション能力と、状況を多角的に捉える資質です。
+    * **美点の活用:** 軽やかに人と繋がり、新しい情報を取り入れ、人生に変化と広がりをもたらします。
+    """,
+    "Water": """
+    **【💧 水の気質を持つ方の定義】**（リンパ質：蟹座、蠍座、魚座など）  
+    * **本来の資質:** 「共感力、受容性、優しさ、直感力」といった水のエレメントを核に持つ、他者の感情を深く理解し、調和を生み出す資質です。
+    * **美点の活用:** 場の雰囲気や人間関係を円滑にし、深い感情的な満足を人生にもたらします。
+    """
+})
+
+DISLIKE_ANALYSIS = MappingProxyType({
+    "Fire": """
+    **【🔥 胆汁質タイプ】：「火」が過剰になり、休息を求めている可能性**
+    * **苦手な香り:** [DISLIKE_OIL] など
+    * 心身が「火」のエレメントを拒否しているのは、ご自身のエネルギーが十分に満たされている証拠ですが、太陽星座が火のエレメント以外の場合は、怒りの感情の抑圧や心身の隠れた炎症を示している可能性もあります。
+
+    この場合「決断力と情熱」が、過剰になりすぎている状態です。この火のアンバランスが、心身の疲弊や自己強制の罠を生み出し、迷いの原因となっている可能性があります。太陽星座が火のエレメントの方の通常モードではありますが、そうでない場合は、ご自身の心と体に怒りの感情の抑圧や隠れた炎症がないか向き合ってみてください。
+    """,
+    "Earth": """
+    **【🌏 神経質タイプ】：本来の「土」が過剰になり、停滞感を感じている可能性**
+    * **苦手な香り:** [DISLIKE_OIL] など
+    * ご自身が「土」のエレメントを拒否しているのは、ご自身のエネルギーが十分に満たされている証拠ですが、太陽星座が土のエレメント以外の場合は、考えすぎて動けない時や疲れている時にこの香りが苦手に感じます。
+
+    **迷いの原因:** （土）の「堅実な継続力」が、「変化への恐れ」に転じてしまっています。この土のアンバランスが、同じ悩みを繰り返す停滞感を生み出し、迷いの原因となっている可能性があります。太陽星座が土のエレメントの方の通常モードではありますが、そうでない場合は、今が考えすぎて動けない時ではないか、ご自身の心身と向き合ってみてください。
+    """,
+    "Air": """
+    **【🌬️ 多血質タイプ】：本来の「風」が過剰になり、地に足がついていない可能性**
+    * **苦手な香り:** [DISLIKE_OIL] など
+    * 心身が「風」のエレメントを拒否しているのは、ご自身のエネルギーが十分に満たされている証拠ですが、太陽星座が風のエレメント以外の場合は、地に足をつけて安心したいのかもしれません。
+
+    **迷いの原因:** （風）の「社交性と柔軟性」が、「散漫さや軽薄さ」に転じてしまっています。この風のアンバランスが同じ悩みを繰り返す停滞感を生み出し、迷いの原因となっている可能性があります。
+
+    太陽星座が風のエレメントの方の通常モードではありますが、そうでない場合は、今が散漫さや軽薄さがでていないか、ご自身の心身と向き合ってみてください。
+    """,
+    "Water": """
+    **【💧 リンパ質タイプ】：「水」が過剰になり、自己主張ができていない可能性**
+    * **苦手な香り:** [DISLIKE_OIL] など
+    * 心身が「水」のエレメントを拒否しているのは、「受容と調和（水）」を重視するあまり、自己主張や決断を下すことを心身が避けているサインかもしれません。
+
+    **迷いの原因:** （水）の「優しさや共感力」が、「自己犠牲や受動性」に転じてしまっています。この水のアンバランスが他者の意見に流されることによる迷いを生み出している可能性があります。
+
+    太陽星座が水のエレメントの方の通常モードではありますが、そうでない場合は、今我慢しすぎていたり、人のために生きすぎているかもしれません。自分に優しい時間を取ってみてください。
+    """
+})
+
+# --- 4. 好きな香りはあなたを調和させます (好き＝不足・薬) ---
+LIKE_ANALYSIS = MappingProxyType({
+    "Fire": """
+    * **好きな香り:** [LIKE_OIL] など
+    * 「火」の香りを好むのは、今の環境からさらに能動的になりたい、情熱をもって行動したいというニーズが強い一方で、自分から前に出るためのエネルギー（火）が圧倒的に不足している状態を示しています。
+    * 自分の人生を自分で決め、情熱をもって行動するためのエネルギー（火）をこの香りは持っています。
+    * あなたの決断力行動力を支えます。
+    """,
+    "Earth": """
+    * **好きな香り:** [LIKE_OIL] など
+    * 「土」の香りを好むのは、地に足をつけて、冷静に過ごしたいときです。
+    * 静かに五感が満たされる時間をすごしましょう。
+    """,
+    "Air": """
+    * **好きな香り:** [LIKE_OIL] など
+    * 「風」の香りを好むのは、現状に新しい風（風）を入れてバランスを取ろうとされているサインです。
+    * 楽しいことを取り入れたり、考えすぎず執着せず緩く過ごしたいときです。
+    """,
+    "Water": """
+    * **好きな香り:** [LIKE_OIL] など
+    * 心身が「水」のエレメントを好むのは、休息やクールダウン、受容することを心身が強く求めているサインかもしれません。
+    * 我慢しすぎていないか、体に炎症がないか、疲れすぎていないか、心身に聞いてみてください。
+    """
+})
+
+SCENTS_CONF = tuple(MappingProxyType(scent) for scent in [
+    {"element": "Fire", "name": "🔥 A (胆汁)", "key": "scent_a"},
+    {"element": "Fire", "name": "🔥 B (胆汁)", "key": "scent_b"},
+    {"element": "Air", "name": "🌬️ C (多血)", "key": "scent_c"},
+    {"element": "Air", "name": "🌬️ D (多血)", "key": "scent_d"},
+    {"element": "Earth", "name": "🌏 E (神経)", "key": "scent_e"},
+    {"element": "Earth", "name": "🌏 F (神経)", "key": "scent_f"},
+    {"element": "Water", "name": "💧 G (リンパ)", "key": "scent_g"},
+    {"element": "Water", "name": "💧 H (リンパ)", "key": "scent_h"},
+])
+
+# --- 🖨️ 印刷設定（スマホ全ページ出力・最終対策版） ---
+PRINT_CSS = """
+        <style>
+        @media print {
+            /* 1. 【CRITICAL FIX】全体を印刷モードで全展開させる */
+            html, body, [data-testid="stAppViewContainer"], [data-testid="stApp"], .main {
+                overflow: visible !important; /* スクロール機能を無効化 */
+                height: auto !important; /* 高さをコンテンツに合わせて全展開 */
+                position: static !important; 
+            }
+            
+            /* 2. 不要な要素を消す */
+            [data-testid="stSidebar"], .stButton, header, footer, [data-testid="stToolbar"] {
+                display: none !important;
+            }
+            
+            /* 3. 用紙設定 (A4) */
+            @page {
+                size: A4 portrait;
+                margin: 5mm; 
+            }
+
+            /* 4. 全体の縮尺調整 (横幅と縦幅の同時対策) */
+            .block-container {
+                max-width: 100% !important;
+                width: 100% !important;
+                padding: 0 !important;
+                margin: 0 !important;
+                zoom: 0.75 !important; /* 横の切れを防ぐため75%に縮小 */
+            }
+
+            /* 5. 文字の折り返し設定 */
+            .stMarkdown, p, h1, h2, h3, h4, h5, h6, li, span, div {
+                white-space: pre-wrap !important;
+                word-wrap: break-word !important;
+            }
+
+            /* 6. カラムを強制的に「横並び」にし、改ページを防ぐ */
+            [data-testid="stHorizontalBlock"] {
+                display: flex !important;
+                flex-direction: row !important;
+                flex-wrap: nowrap !important;
+            }
+            
+            [data-testid="column"] {
+                flex: 1 !important;
+                width: auto !important;
+                page-break-inside: avoid !important;
+            }
+            
+            /* 7. グラフのサイズ調整 */
+            .stPlotlyChart {
+                width: 100% !important;
+                height: auto !important;
+                page-break-inside: avoid;
+            }
+        }
+        </style>
+"""
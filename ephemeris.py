@@ -0,0 +1,117 @@
+# --- 🌟 天体暦ファイル（.se1）の準備 ---
+# プロセスごとに1回だけ実行する。足りないファイルは並列にストリーミングでダウンロードし、
+# サイズ・sha256・ヘッダを確認してから一時ファイルを rename で置き換える（途中のファイルは見えない）。
+#
+# 環境変数:
+#   AROMA_EPHE_DIR       .se1 を置くディレクトリ（既定: カレントディレクトリ）
+#   AROMA_EPHE_MODE      download（既定）/ offline（ダウンロードしない）/ bundled（flatlib 同梱のファイルを使う）
+#   AROMA_EPHE_BASE_URL  ダウンロード元（既定: GitHub の aloistr/swisseph）
+import hashlib
+import os
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+import swisseph as swe
+
+BASE_URL = "https://raw.githubusercontent.com/aloistr/swisseph/master/ephe/"
+
+# ファイル名 → (バイト数, sha256)。aloistr/swisseph の ephe/ にある 1800〜2400年のファイル。
+# サーバーの Content-Length は信用せず、受け取った中身をこの値と照合する。
+# AROMA_EPHE_BASE_URL で別のミラーを使う場合も、中身は同じものである必要がある。
+EPHE_FILES = {
+    "sepl_18.se1": (484055, "0b7e416e3c1be9e6a0dd1d711dae7f7685793a0e7df13f76363a493dc27b6ea1"),
+    "semo_18.se1": (1304771, "ecfa54dbf5bc0b5a9bc3e04ed28629a821e98625eacae38f4070593bba0e2980"),
+    "seas_18.se1": (223002, "5fd9c2aa1654e37c09a6aeb558076e795409b7dc4bd948ebc0faa7d4a7686b5b"),
+}
+
+HEADER = b"SWISSEPH"
+CHUNK_SIZE = 64 * 1024
+TIMEOUT = 30
+
+_lock = threading.Lock()
+_ready_path = None
+
+
+class EphemerisError(Exception):
+    pass
+
+
+def bundled_dir():
+    import flatlib
+    return os.path.join(flatlib.PATH_RES, "swefiles")
+
+
+def config_from_env():
+    return {
+        "ephe_dir": os.environ.get("AROMA_EPHE_DIR") or os.getcwd(),
+        "mode": os.environ.get("AROMA_EPHE_MODE", "download"),
+        "base_url": os.environ.get("AROMA_EPHE_BASE_URL", BASE_URL),
+    }
+
+
+def _download(filename, url, ephe_dir, expected_size, expected_sha256):
+    fd, tmp_path = tempfile.mkstemp(prefix=f".{filename}.", suffix=".part", dir=ephe_dir)
+    try:
+        digest = hashlib.sha256()
+        written = 0
+        with os.fdopen(fd, "wb") as f:
+            with requests.get(url, stream=True, timeout=TIMEOUT) as response:
+                response.raise_for_status()
+                for chunk in response.iter_content(chunk_size=CHUNK_SIZE):
+                    written += len(chunk)
+                    # 大きすぎる中身は最後まで受け取らずに打ち切る
+                    if written > expected_size:
+                        raise EphemerisError(f"{filename}: larger than {expected_size} bytes")
+                    f.write(chunk)
+                    digest.update(chunk)
+        if written != expected_size:
+            raise EphemerisError(f"{filename}: size mismatch ({written} != {expected_size})")
+        if digest.hexdigest() != expected_sha256:
+            raise EphemerisError(f"{filename}: sha256 mismatch")
+        with open(tmp_path, "rb") as f:
+            if f.read(len(HEADER)) != HEADER:
+                raise EphemerisError(f"{filename}: not a Swiss Ephemeris file")
+        os.replace(tmp_path, os.path.join(ephe_dir, filename))
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def provision(ephe_dir, mode="download", base_url=BASE_URL):
+    if mode == "bundled":
+        ephe_dir = bundled_dir()
+    os.makedirs(ephe_dir, exist_ok=True)
+
+    missing = [name for name in EPHE_FILES if not os.path.exists(os.path.join(ephe_dir, name))]
+    if missing:
+        if mode != "download":
+            raise EphemerisError(f"missing ephemeris files in {ephe_dir}: {', '.join(missing)}")
+        with ThreadPoolExecutor(max_workers=len(missing)) as pool:
+            futures = [
+                pool.submit(_download, name, base_url + name, ephe_dir, *EPHE_FILES[name])
+                for name in missing
+            ]
+            for future in futures:
+                future.result()
+
+    swe.set_ephe_path(ephe_dir)
+    return ephe_dir
+
+
+def ensure_ephemeris(ephe_dir=None, mode=None, base_url=None):
+    # 2回目以降は何もしない。同時に呼ばれても準備は1スレッドだけが行う
+    global _ready_path
+    if _ready_path is not None:
+        return _ready_path
+    with _lock:
+        if _ready_path is None:
+            config = config_from_env()
+            _ready_path = provision(
+                ephe_dir or config["ephe_dir"],
+                mode or config["mode"],
+                base_url or config["base_url"],
+            )
+    return _ready_path
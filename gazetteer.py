@@ -0,0 +1,223 @@
+# --- 🗾 市区町村の出生地データ ---
+# 都道府県庁の位置だけでは、北海道や沖縄のように県内で経度・緯度が大きく違うところで
+# ASC・MC（各5点）がずれるので、出生地は市区町村役場の位置で計算する。
+# data/gazetteer.bin（tools/build_gazetteer.py で生成）を初回だけ読み込み、
+#   - 名前・よみがな（ひらがな/カタカナ/半角カナ）の前方一致検索（入力補完用）
+#   - 座標から最も近い市区町村の検索（0.5度四方のマス目で近くだけを見る）
+# をメモリ上の索引で行う。
+import math
+import os
+import struct
+import sys
+import unicodedata
+from array import array
+from bisect import bisect_left
+
+from content import PREFECTURES
+
+GAZETTEER_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "gazetteer.bin")
+GAZETTEER_MAGIC = b"ASNG"
+GAZETTEER_VERSION = 1
+
+# ファイル形式（リトルエンディアン）:
+#   ヘッダ: magic(4s) version(H) 件数(I)
+#   続けて 団体コード(uint32 x 件数) 都道府県番号(uint8 x 件数, PREFECTURES の順)
+#   緯度(float32 x 件数) 経度(float32 x 件数)
+#   名前・よみがなは、それぞれ長さ(I) + 改行区切りの UTF-8
+_HEADER = struct.Struct("<4sHI")
+_LENGTH = struct.Struct("<I")
+
+CELL = 0.5
+MAX_RINGS = 40
+SEARCH_SCAN = 500
+_PREFECTURE_NAMES = list(PREFECTURES)
+
+_gazetteer = None
+
+
+# カタカナ → ひらがな、空白は削除
+_KANA_TABLE = {code: code - 0x60 for code in range(ord("ァ"), ord("ヶ") + 1)}
+_KANA_TABLE.update({ord(" "): None, ord("\t"): None})
+
+
+def normalize(text):
+    # 全角/半角をそろえ（NFKC で全角空白も半角になる）、カタカナはひらがなにし、空白を除く
+    return unicodedata.normalize("NFKC", text).translate(_KANA_TABLE)
+
+
+def _le(arr):
+    if sys.byteorder == "big":
+        arr.byteswap()
+    return arr
+
+
+def write_gazetteer(path, places):
+    # places: {"code", "prefecture", "name", "kana", "lat", "lon"} の並び
+    with open(path, "wb") as f:
+        f.write(_HEADER.pack(GAZETTEER_MAGIC, GAZETTEER_VERSION, len(places)))
+        f.write(_le(array("I", (int(p["code"]) for p in places))).tobytes())
+        f.write(bytes(_PREFECTURE_NAMES.index(p["prefecture"]) for p in places))
+        f.write(_le(array("f", (p["lat"] for p in places))).tobytes())
+        f.write(_le(array("f", (p["lon"] for p in places))).tobytes())
+        for field in ("name", "kana"):
+            blob = "\n".join(p[field] for p in places).encode("utf-8")
+            f.write(_LENGTH.pack(len(blob)))
+            f.write(blob)
+
+
+def read_gazetteer(path):
+    with open(path, "rb") as f:
+        data = f.read()
+    magic, version, count = _HEADER.unpack_from(data, 0)
+    if magic != GAZETTEER_MAGIC or version != GAZETTEER_VERSION:
+        raise ValueError(f"unsupported gazetteer file: {path}")
+    offset = _HEADER.size
+
+    def take(typecode):
+        nonlocal offset
+        arr = array(typecode)
+        size = arr.itemsize * count
+        arr.frombytes(data[offset:offset + size])
+        offset += size
+        return _le(arr)
+
+    codes = take("I")
+    prefectures = data[offset:offset + count]
+    offset += count
+    lats = take("f")
+    lons = take("f")
+    texts = []
+    for _ in range(2):
+        (length,) = _LENGTH.unpack_from(data, offset)
+        offset += _LENGTH.size
+        texts.append(data[offset:offset + length].decode("utf-8").split("\n"))
+        offset += length
+    return Gazetteer(codes, prefectures, lats, lons, texts[0], texts[1])
+
+
+def load_gazetteer():
+    # 初回だけ読み込む
+    global _gazetteer
+    if _gazetteer is None:
+        _gazetteer = read_gazetteer(GAZETTEER_PATH)
+    return _gazetteer
+
+
+class Gazetteer:
+    def __init__(self, codes, prefectures, lats, lons, names, kanas):
+        self.codes = codes
+        self.prefectures = prefectures
+        self.lats = lats
+        self.lons = lons
+        self.names = names
+        self.kanas = kanas
+        self._by_code = {f"{code:06d}": i for i, code in enumerate(codes)}
+
+        # 前方一致用: 正規化した見出し語を並べ替えて二分探索する。
+        # 見出し語は「名前」「都道府県+名前」「よみがな」と、政令市の区は区名だけのものも入れる
+        entries = set()
+        for i, (name, kana) in enumerate(zip(names, kanas)):
+            prefecture = _PREFECTURE_NAMES[prefectures[i]]
+            keys = {name, prefecture + name, kana}
+            if " " in name:
+                keys.add(name.split(" ", 1)[1])
+                keys.add(kana.split(" ", 1)[1])
+            entries.update((normalize(key), i) for key in keys)
+        entries = sorted(entries)
+        self._keys = [key for key, _ in entries]
+        self._index = array("H", (i for _, i in entries))
+
+        # 近傍検索用: 0.5度四方のマス目ごとの番号
+        self._cells = {}
+        for i, (lat, lon) in enumerate(zip(lats, lons)):
+            self._cells.setdefault((math.floor(lat / CELL), math.floor(lon / CELL)), []).append(i)
+
+    def __len__(self):
+        return len(self.codes)
+
+    def place(self, i):
+        return {
+            "code": f"{self.codes[i]:06d}",
+            "prefecture": _PREFECTURE_NAMES[self.prefectures[i]],
+            "name": self.names[i],
+            "kana": self.kanas[i],
+            "lat": round(self.lats[i], 6),
+            "lon": round(self.lons[i], 6),
+        }
+
+    def label(self, i):
+        return f"{_PREFECTURE_NAMES[self.prefectures[i]]} {self.names[i]}（{self.kanas[i]}）"
+
+    def find(self, code):
+        # 団体コード（6桁の文字列）から番号を返す。無ければ None
+        return self._by_code.get(code)
+
+    def search(self, query, limit=10):
+        # 前方一致。完全一致・短い見出し語を先に、同じなら団体コード順
+        query = normalize(query)
+        if not query:
+            return []
+        best = {}
+        start = bisect_left(self._keys, query)
+        for pos in range(start, min(start + SEARCH_SCAN, len(self._keys))):
+            key = self._keys[pos]
+            if not key.startswith(query):
+                break
+            i = self._index[pos]
+            rank = (len(key) - len(query), self.codes[i])
+            if i not in best or rank < best[i]:
+                best[i] = rank
+        return [self.place(i) for i in sorted(best, key=best.get)[:limit]]
+
+    def nearest(self, lat, lon):
+        # 最も近い市区町村（距離 km 付き）。半径 20 度以内に無ければ None
+        if not (math.isfinite(lat) and math.isfinite(lon) and abs(lat) <= 90 and abs(lon) <= 180):
+            raise ValueError("lat must be within ±90 and lon within ±180")
+        cos_lat = math.cos(math.radians(lat))
+        row, col = math.floor(lat / CELL), math.floor(lon / CELL)
+        best, best_d2 = None, None
+        for ring in range(MAX_RINGS + 1):
+            for cell in _ring_cells(row, col, ring):
+                for i in self._cells.get(cell, ()):
+                    d2 = (self.lats[i] - lat) ** 2 + ((self.lons[i] - lon) * cos_lat) ** 2
+                    if best_d2 is None or d2 < best_d2:
+                        best, best_d2 = i, d2
+            # 次のマス目の輪の点は少なくとも ring * CELL（経度方向は cos 倍）離れている
+            if best is not None and math.sqrt(best_d2) <= ring * CELL * cos_lat:
+                break
+        if best is None:
+            return None
+        place = self.place(best)
+        place["distance_km"] = round(_haversine_km(lat, lon, self.lats[best], self.lons[best]), 3)
+        return place
+
+
+def _ring_cells(row, col, ring):
+    # (row, col) から ring マス離れた正方形の外周のマス目
+    if ring == 0:
+        yield row, col
+        return
+    for c in range(col - ring, col + ring + 1):
+        yield row - ring, c
+        yield row + ring, c
+    for r in range(row - ring + 1, row + ring):
+        yield r, col - ring
+        yield r, col + ring
+
+
+def _haversine_km(lat1, lon1, lat2, lon2):
+    p1, p2 = math.radians(lat1), math.radians(lat2)
+    dp, dl = p2 - p1, math.radians(lon2 - lon1)
+    a = math.sin(dp / 2) ** 2 + math.cos(p1) * math.cos(p2) * math.sin(dl / 2) ** 2
+    return 2 * 6371.0088 * math.asin(math.sqrt(a))
+
+
+def resolve_place(place):
+    # 出生地（都道府県名、または市区町村の団体コード6桁）を (緯度, 経度) にする
+    if place in PREFECTURES:
+        return PREFECTURES[place]
+    gazetteer = load_gazetteer()
+    i = gazetteer.find(place)
+    if i is None:
+        raise ValueError(f"unknown birthplace: {place}")
+    return gazetteer.lats[i], gazetteer.lons[i]
@@ -0,0 +1,180 @@
+# --- 👥 グループ（ワークショップ）モード ---
+# 参加者の出生データと香りの順位を CSV でまとめて受け取り、全員の astro_scores / scent_scores を求めて、
+# 2人ずつのエレメントの相性を N×N の行列にする。
+#
+# 相性は、それぞれのエレメントの割合（合計 1）のベクトル p_i, p_j と、
+# エレメント同士の相性表 ELEMENT_AFFINITY から p_i・A・p_j を 0〜100 にしたもの。
+#   星:   astro_scores の割合
+#   香り: 順位を「好き度」（9 - 順位）にしてエレメントごとに足した割合
+import codecs
+import csv
+import io
+from collections import Counter
+
+import numpy as np
+
+from content import ELEMENT_JP, ELEMENT_KEYS, PREFECTURES, SCENTS_CONF
+from gazetteer import load_gazetteer
+from scoring import BIRTH_FIELDS, analyze, validate_birth, validate_scent_ranks
+
+CSV_FIELDS = ("name",) + tuple(BIRTH_FIELDS) + ("place",) + tuple(scent["key"] for scent in SCENTS_CONF)
+MAX_PARTICIPANTS = 500
+
+# 同じエレメント 1.0、火と風・地と水（互いに活かし合う組）0.8、
+# 火と地・風と水 0.4、火と水・地と風（打ち消し合う組）0.2
+ELEMENT_AFFINITY = np.array([
+    # Fire Earth Air  Water
+    [1.0, 0.4, 0.8, 0.2],  # Fire
+    [0.4, 1.0, 0.2, 0.8],  # Earth
+    [0.8, 0.2, 1.0, 0.4],  # Air
+    [0.2, 0.8, 0.4, 1.0],  # Water
+])
+
+# 香りの順位（SCENTS_CONF の順）→ エレメントへの振り分け（8 x 4）
+_SCENT_ELEMENTS = np.array([[scent["element"] == k for k in ELEMENT_KEYS] for scent in SCENTS_CONF], dtype=float)
+
+
+def template_csv():
+    # 入力用のひな形（見出し + 記入例1行）
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    writer.writerow(CSV_FIELDS)
+    writer.writerow(["山田 花子", 1990, 1, 1, 12, 0, "131041"] + list(range(1, len(SCENTS_CONF) + 1)))
+    return buf.getvalue()
+
+
+def parse_participant(row):
+    # CSV の1行（dict）→ 参加者。おかしな値は ValueError
+    name = (row.get("name") or "").strip() or "Guest"
+    birth = []
+    for field in BIRTH_FIELDS:
+        value = (row.get(field) or "").strip()
+        if not value.isdigit():
+            raise ValueError(f"{field} must be a number")
+        birth.append(int(value))
+    validate_birth(birth)
+    place = (row.get("place") or "").strip()
+    if place not in PREFECTURES and load_gazetteer().find(place) is None:
+        raise ValueError(f"unknown birthplace: {place}")
+    scent_ranks = {}
+    for scent in SCENTS_CONF:
+        value = (row.get(scent["key"]) or "").strip()
+        if not value.isdigit():
+            raise ValueError(f"{scent['key']} must be a number")
+        scent_ranks[scent["key"]] = int(value)
+    validate_scent_ranks(scent_ranks)
+    return {"name": name, "birth": tuple(birth) + (place,), "scent_ranks": scent_ranks}
+
+
+def detect_encoding(head):
+    # 先頭のバイト列から文字コードを決める。日本語版 Excel の「CSV」は Shift_JIS（cp932）で書き出される
+    try:
+        codecs.getincrementaldecoder("utf-8-sig")().decode(head, final=False)
+        return "utf-8-sig"
+    except UnicodeDecodeError:
+        return "cp932"
+
+
+def parse_participants(text):
+    # CSV の文字列（decode_csv で文字列にしておく）→ (参加者のリスト, [(行番号, エラー文), ...])
+    # 同じ名前（空欄の Guest を含む）が複数あれば、相性表で区別できるよう名前に行番号を付ける
+    reader = csv.DictReader(io.StringIO(text))
+    missing = [field for field in CSV_FIELDS if field not in (reader.fieldnames or ())]
+    if missing:
+        return [], [(1, f"missing columns: {', '.join(missing)}")]
+    participants, lines, errors = [], [], []
+    for row in reader:
+        if len(participants) >= MAX_PARTICIPANTS:
+            errors.append((reader.line_num, f"too many participants (at most {MAX_PARTICIPANTS})"))
+            break
+        try:
+            participants.append(parse_participant(row))
+            lines.append(reader.line_num)
+        except ValueError as e:
+            errors.append((reader.line_num, str(e)))
+    counts = Counter(participant["name"] for participant in participants)
+    for participant, line in zip(participants, lines):
+        if counts[participant["name"]] > 1:
+            participant["name"] = f"{participant['name']}（{line}行目）"
+    return participants, errors
+
+
+def decode_csv(data):
+    # アップロードされたバイト列 → 文字列（UTF-8 でなければ cp932 として読む）
+    encoding = detect_encoding(data[:65536])
+    try:
+        return data.decode(encoding)
+    except UnicodeDecodeError:
+        raise ValueError(f"cannot decode the CSV as {encoding}") from None
+
+
+def analyze_group(participants, natal_cache=None, chart_service=None):
+    # 全員分の分析結果と、(N, 4) の astro_scores / scent_scores
+    # chart_service があれば、全員の星の計算をまとめてワーカーに分けて送る
+    natals = [None] * len(participants)
+    if chart_service is not None:
+        natals = chart_service.natal_many([participant["birth"] for participant in participants])
+    analyses = []
+    for participant, natal in zip(participants, natals):
+        analysis = analyze(participant["birth"], participant["scent_ranks"], natal_cache=natal_cache, natal=natal)
+        analyses.append(dict(analysis, name=participant["name"]))
+    astro = np.array([[a["astro_scores"][k] for k in ELEMENT_KEYS] for a in analyses], dtype=float)
+    scent = np.array([[a["scent_scores"][k] for k in ELEMENT_KEYS] for a in analyses], dtype=float)
+    ranks = np.array([[p["scent_ranks"][s["key"]] for s in SCENTS_CONF] for p in participants], dtype=float)
+    return {
+        "names": [a["name"] for a in analyses],
+        "analyses": analyses,
+        "astro": astro.reshape(-1, len(ELEMENT_KEYS)),
+        "scent": scent.reshape(-1, len(ELEMENT_KEYS)),
+        "ranks": ranks.reshape(-1, len(SCENTS_CONF)),
+    }
+
+
+def astro_profile(group):
+    return _normalize(group["astro"])
+
+
+def scent_profile(group):
+    # 順位 1（好き）→ 8、順位 8（苦手）→ 1 にしてエレメントごとに足す
+    return _normalize((len(SCENTS_CONF) + 1 - group["ranks"]) @ _SCENT_ELEMENTS)
+
+
+def _normalize(values):
+    totals = values.sum(axis=1, keepdims=True)
+    return np.divide(values, totals, out=np.zeros_like(values), where=totals > 0)
+
+
+def compatibility_matrix(profiles):
+    # profiles: (N, 4) の割合 → (N, N) の相性（0〜100）
+    return profiles @ ELEMENT_AFFINITY @ profiles.T * 100
+
+
+def top_pairs(names, matrix, count=10):
+    # 相性の高い組（同じ人同士は除く）を高い順に
+    rows, cols = np.triu_indices(len(names), k=1)
+    order = np.argsort(-matrix[rows, cols], kind="stable")[:count]
+    return [(names[rows[i]], names[cols[i]], float(matrix[rows[i], cols[i]])) for i in order]
+
+
+def matrix_csv(names, matrix):
+    # 相性表の CSV（Excel で文字化けしないよう BOM 付き UTF-8 のバイト列）
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    writer.writerow([""] + list(names))
+    for name, row in zip(names, matrix):
+        writer.writerow([name] + [f"{value:.1f}" for value in row])
+    return buf.getvalue().encode("utf-8-sig")
+
+
+def participants_csv(group):
+    # 参加者ごとのスコアと本質/好き/苦手のエレメント
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    writer.writerow(["name"] + [f"astro_{k}" for k in ELEMENT_KEYS] + [f"scent_{k}" for k in ELEMENT_KEYS]
+                    + ["core", "like", "dislike"])
+    for analysis in group["analyses"]:
+        writer.writerow([analysis["name"]]
+                        + [analysis["astro_scores"][k] for k in ELEMENT_KEYS]
+                        + [analysis["scent_scores"][k] for k in ELEMENT_KEYS]
+                        + [ELEMENT_JP[analysis[k]] for k in ("core", "like", "dislike")])
+    return buf.getvalue().encode("utf-8-sig")
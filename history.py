@@ -0,0 +1,168 @@
+# --- 🗂️ 分析履歴 ---
+# お客様ごとの分析結果を SQLite に残す。
+#   clients:  お名前 + 出生データごとに1行。星のサイン（12点）もここに持ち、
+#             2回目以降は Chart を計算し直さずにここから返す。
+#   analyses: 分析1回ごとに1行。香りの順位（8桁の文字列）と本質/好き/苦手のエレメント番号だけを保存し、
+#             香りのスコアは順位から組み立て直す。
+# 一覧は OFFSET を使わず「前のページの最後の id より小さいもの」を索引で引く（件数が増えても速さが変わらない）。
+import os
+import sqlite3
+import threading
+import time
+
+from astro import PLANETS, SIGNS, score_signs
+from content import ELEMENT_KEYS, SCENTS_CONF
+
+# サインは POINTS の順に SIGNS の番号（16進1文字）を並べた12文字で保存する
+POINTS = [name for name, _ in PLANETS] + ["Asc", "Mc"]
+SCHEMA = (
+    "CREATE TABLE IF NOT EXISTS clients ("
+    " id INTEGER PRIMARY KEY,"
+    " name TEXT NOT NULL,"
+    " birth TEXT NOT NULL,"
+    " natal_version INTEGER NOT NULL,"
+    " signs TEXT NOT NULL,"
+    " created_at INTEGER NOT NULL,"
+    " UNIQUE (name, birth))",
+    "CREATE TABLE IF NOT EXISTS analyses ("
+    " id INTEGER PRIMARY KEY,"
+    " client_id INTEGER NOT NULL REFERENCES clients (id),"
+    " created_at INTEGER NOT NULL,"
+    " ranks TEXT NOT NULL,"
+    " core INTEGER NOT NULL,"
+    " like_elem INTEGER NOT NULL,"
+    " dislike_elem INTEGER NOT NULL)",
+    "CREATE INDEX IF NOT EXISTS analyses_client ON analyses (client_id, id)",
+)
+
+
+def encode_birth(birth):
+    # birth: (年, 月, 日, 時, 分, 出生地)
+    b_year, b_month, b_day, b_hour, b_min, place = birth
+    return f"{b_year:04d}/{b_month:02d}/{b_day:02d} {b_hour:02d}:{b_min:02d}|{place}"
+
+
+def encode_signs(signs):
+    return "".join(format(SIGNS.index(signs[point]), "x") for point in POINTS)
+
+
+def decode_signs(text):
+    indexes = {point: int(ch, 16) for point, ch in zip(POINTS, text)}
+    return {
+        "signs": {point: SIGNS[i] for point, i in indexes.items()},
+        "astro_scores": score_signs(indexes),
+    }
+
+
+def encode_ranks(scent_ranks):
+    return "".join(str(int(scent_ranks[scent["key"]])) for scent in SCENTS_CONF)
+
+
+def decode_ranks(text):
+    scent_ranks = {scent["key"]: int(ch) for scent, ch in zip(SCENTS_CONF, text)}
+    scent_scores = {"Fire": 0, "Earth": 0, "Air": 0, "Water": 0}
+    for scent in SCENTS_CONF:
+        scent_scores[scent["element"]] += scent_ranks[scent["key"]]
+    return scent_ranks, scent_scores
+
+
+class HistoryStore:
+    def __init__(self, db_path, natal_version=1):
+        # natal_version: 保存されたサインの計算仕様（NatalCache.VERSION）。違う行は使わない
+        self.db_path = db_path
+        self.natal_version = natal_version
+        self.natal_hits = 0
+        self._lock = threading.Lock()
+        # Streamlit はセッションごとに別スレッドで動くので、接続は共有してロックで守る
+        self._db = sqlite3.connect(db_path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        for statement in SCHEMA:
+            self._db.execute(statement)
+        self._db.commit()
+
+    @classmethod
+    def from_env(cls, natal_version=1):
+        # AROMA_HISTORY_DB="" で履歴の保存を無効化（None を返す）
+        db_path = os.environ.get("AROMA_HISTORY_DB", "history.sqlite3")
+        if not db_path:
+            return None
+        return cls(db_path, natal_version=natal_version)
+
+    def find_client(self, name, birth):
+        with self._lock:
+            row = self._db.execute(
+                "SELECT id FROM clients WHERE name = ? AND birth = ?", (name, encode_birth(birth))
+            ).fetchone()
+        return row[0] if row is not None else None
+
+    def natal(self, name, birth):
+        # 以前に同じお名前・出生データで分析していれば、その星のサインとスコアを返す
+        with self._lock:
+            row = self._db.execute(
+                "SELECT signs FROM clients WHERE name = ? AND birth = ? AND natal_version = ?",
+                (name, encode_birth(birth), self.natal_version),
+            ).fetchone()
+            if row is None:
+                return None
+            self.natal_hits += 1
+        return decode_signs(row[0])
+
+    def record(self, name, birth, scent_ranks, analysis, created_at=None):
+        # 分析1回分を保存し、analyses の id を返す
+        created_at = int(time.time() if created_at is None else created_at)
+        birth_text = encode_birth(birth)
+        signs_text = encode_signs(analysis["signs"])
+        with self._lock, self._db:
+            self._db.execute(
+                "INSERT INTO clients (name, birth, natal_version, signs, created_at) VALUES (?, ?, ?, ?, ?)"
+                " ON CONFLICT (name, birth) DO UPDATE SET natal_version = excluded.natal_version,"
+                " signs = excluded.signs",
+                (name, birth_text, self.natal_version, signs_text, created_at),
+            )
+            client_id = self._db.execute(
+                "SELECT id FROM clients WHERE name = ? AND birth = ?", (name, birth_text)
+            ).fetchone()[0]
+            cursor = self._db.execute(
+                "INSERT INTO analyses (client_id, created_at, ranks, core, like_elem, dislike_elem)"
+                " VALUES (?, ?, ?, ?, ?, ?)",
+                (client_id, created_at, encode_ranks(scent_ranks),
+                 ELEMENT_KEYS.index(analysis["core"]), ELEMENT_KEYS.index(analysis["like"]),
+                 ELEMENT_KEYS.index(analysis["dislike"])),
+            )
+        return cursor.lastrowid
+
+    def sessions(self, client_id, limit=20, before=None):
+        # 新しい順に limit 件。次のページは before=（前のページの最後の "id"）で引く
+        query = "SELECT id, created_at, ranks, core, like_elem, dislike_elem FROM analyses WHERE client_id = ?"
+        params = [client_id]
+        if before is not None:
+            query += " AND id < ?"
+            params.append(before)
+        query += " ORDER BY id DESC LIMIT ?"
+        params.append(limit)
+        with self._lock:
+            rows = self._db.execute(query, params).fetchall()
+        sessions = []
+        for analysis_id, created_at, ranks, core, like, dislike in rows:
+            scent_ranks, scent_scores = decode_ranks(ranks)
+            sessions.append({
+                "id": analysis_id,
+                "created_at": created_at,
+                "scent_ranks": scent_ranks,
+                "scent_scores": scent_scores,
+                "core": ELEMENT_KEYS[core],
+                "like": ELEMENT_KEYS[like],
+                "dislike": ELEMENT_KEYS[dislike],
+            })
+        return sessions
+
+    def count_sessions(self, client_id):
+        with self._lock:
+            return self._db.execute(
+                "SELECT COUNT(*) FROM analyses WHERE client_id = ?", (client_id,)
+            ).fetchone()[0]
+
+    def stats(self):
+        with self._lock:
+            return {"natal_hits": self.natal_hits}
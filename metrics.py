@@ -0,0 +1,150 @@
+# --- 📈 段階ごとの処理時間の計測 ---
+# with span("natal"): ... のように囲んだ処理の時間を記録し、
+#   - 構造化ログ（1行1 JSON）
+#   - 直近の p50 / p95（管理者用のサイドバー表示）
+#   - Prometheus のテキスト形式（AROMA_METRICS_PORT を指定したときの /metrics）
+# の3通りで出す。span の中で例外が起きたら、その段階のエラー数を数えてから投げ直す。
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+
+WINDOW = 512
+QUANTILES = (0.5, 0.95)
+
+logger = logging.getLogger("aroma.metrics")
+
+_lock = threading.Lock()
+_stages = OrderedDict()
+_collectors = []
+_server = None
+
+
+def setup_logging():
+    # Streamlit のロガー設定とは別に、aroma.* のログを標準エラーへ出す
+    root = logging.getLogger("aroma")
+    if not root.handlers:
+        handler = logging.StreamHandler()
+        handler.setFormatter(logging.Formatter("%(asctime)s %(name)s %(message)s"))
+        root.addHandler(handler)
+        root.setLevel(os.environ.get("AROMA_LOG_LEVEL", "INFO").upper())
+        root.propagate = False
+
+
+def _stage(name):
+    stage = _stages.get(name)
+    if stage is None:
+        stage = _stages[name] = {"recent": deque(maxlen=WINDOW), "count": 0, "sum": 0.0, "errors": 0}
+    return stage
+
+
+def observe(name, seconds, ok=True):
+    with _lock:
+        stage = _stage(name)
+        stage["recent"].append(seconds)
+        stage["count"] += 1
+        stage["sum"] += seconds
+        if not ok:
+            stage["errors"] += 1
+    logger.info(json.dumps({"stage": name, "ms": round(seconds * 1000, 3), "ok": ok}))
+
+
+@contextmanager
+def span(name):
+    start = time.perf_counter()
+    try:
+        yield
+    except BaseException as e:
+        # st.stop() / st.rerun() は Streamlit の制御用の例外なのでエラーに数えない
+        control = any(cls.__name__ == "ScriptControlException" for cls in type(e).__mro__)
+        observe(name, time.perf_counter() - start, ok=control)
+        raise
+    observe(name, time.perf_counter() - start)
+
+
+def _quantile(ordered, q):
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def snapshot():
+    # 段階ごとに直近 WINDOW 件の p50 / p95（ミリ秒）と累計件数・エラー数を返す
+    with _lock:
+        stages = {name: (sorted(s["recent"]), s["count"], s["sum"], s["errors"]) for name, s in _stages.items()}
+    return OrderedDict(
+        (name, {
+            "p50_ms": _quantile(ordered, 0.5) * 1000,
+            "p95_ms": _quantile(ordered, 0.95) * 1000,
+            "count": count,
+            "errors": errors,
+            "sum_s": total,
+        })
+        for name, (ordered, count, total, errors) in stages.items()
+    )
+
+
+def register_collector(func):
+    # func() は {"メトリクス名": 値} を返す（キャッシュのヒット数などをゲージとして出す）
+    with _lock:
+        if func not in _collectors:
+            _collectors.append(func)
+
+
+def prometheus_text():
+    lines = [
+        "# HELP aroma_stage_seconds Duration of each processing stage (recent window quantiles).",
+        "# TYPE aroma_stage_seconds summary",
+    ]
+    stages = snapshot()
+    for name, s in stages.items():
+        with _lock:
+            ordered = sorted(_stages[name]["recent"])
+        for q in QUANTILES:
+            lines.append(f'aroma_stage_seconds{{stage="{name}",quantile="{q}"}} {_quantile(ordered, q):.6f}')
+        lines.append(f'aroma_stage_seconds_sum{{stage="{name}"}} {s["sum_s"]:.6f}')
+        lines.append(f'aroma_stage_seconds_count{{stage="{name}"}} {s["count"]}')
+    lines += [
+        "# HELP aroma_stage_errors_total Exceptions raised inside each stage.",
+        "# TYPE aroma_stage_errors_total counter",
+    ]
+    for name, s in stages.items():
+        lines.append(f'aroma_stage_errors_total{{stage="{name}"}} {s["errors"]}')
+    with _lock:
+        collectors = list(_collectors)
+    for func in collectors:
+        for metric, value in func().items():
+            lines.append(f"# TYPE {metric} gauge")
+            lines.append(f"{metric} {value}")
+    return "\n".join(lines) + "\n"
+
+
+def start_http_server(port, host="127.0.0.1"):
+    # プロセスごとに1つ。ローカルのスクレイパーから読む想定なので既定は 127.0.0.1 で待ち受ける
+    # （http.server は使うときだけ import する）
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?")[0] != "/metrics":
+                self.send_error(404)
+                return
+            body = prometheus_text().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    global _server
+    with _lock:
+        if _server is None:
+            _server = ThreadingHTTPServer((host, port), MetricsHandler)
+            threading.Thread(target=_server.serve_forever, name="metrics", daemon=True).start()
+    return _server
@@ -0,0 +1,114 @@
+# --- 🌟 出生図（ネイタル）キャッシュ ---
+# 同じ出生データ（日付・時刻・UTCオフセット・出生地）の計算結果を再利用する。
+# メモリ上の LRU と、再起動後も残る SQLite の2段構成。
+# 保存するのは12天体・感受点のサインと astro_scores だけ（Chart 本体は持たない）。
+# SQLite は disk_maxsize 件を超えたら、書き込みの古いものから消す（PRUNE_EVERY 件書くごとに確認）。
+import json
+import os
+import sqlite3
+import threading
+from collections import OrderedDict
+
+
+class NatalCache:
+    # スコア計算の仕様が変わったら上げる（古いディスク上のエントリを読まないため）
+    # 3: 1948〜1951年の夏時間に対応（履歴に残っているその期間のサインも計算し直させる）
+    VERSION = 3
+    PRUNE_EVERY = 256
+
+    def __init__(self, maxsize=1024, db_path=None, disk_maxsize=100_000):
+        self.maxsize = maxsize
+        self.db_path = db_path
+        self.disk_maxsize = disk_maxsize
+        self._puts = 0
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self._lru = OrderedDict()
+        self._lock = threading.Lock()
+        self._db = None
+        if db_path:
+            # Streamlit はセッションごとに別スレッドで動くので、接続は共有してロックで守る
+            self._db = sqlite3.connect(db_path, check_same_thread=False)
+            # 書き込みのたびに fsync で待たされないよう WAL にする
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("PRAGMA synchronous=NORMAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS natal ("
+                " key TEXT PRIMARY KEY,"
+                " signs TEXT NOT NULL,"
+                " scores TEXT NOT NULL)"
+            )
+            self._prune()
+            self._db.commit()
+
+    @classmethod
+    def from_env(cls):
+        # AROMA_NATAL_CACHE_DB="" でディスク保存を無効化
+        # AROMA_NATAL_CACHE_SIZE はメモリ上、AROMA_NATAL_CACHE_DISK_SIZE は SQLite に残す件数の上限
+        db_path = os.environ.get("AROMA_NATAL_CACHE_DB", "natal_cache.sqlite3")
+        maxsize = int(os.environ.get("AROMA_NATAL_CACHE_SIZE", "1024"))
+        disk_maxsize = int(os.environ.get("AROMA_NATAL_CACHE_DISK_SIZE", "100000"))
+        return cls(maxsize=maxsize, db_path=db_path or None, disk_maxsize=disk_maxsize)
+
+    @staticmethod
+    def make_key(date_str, time_str, utcoffset, place):
+        return f"v{NatalCache.VERSION}|{date_str}|{time_str}|{utcoffset}|{place}"
+
+    def get(self, key):
+        with self._lock:
+            entry = self._lru.get(key)
+            if entry is not None:
+                self._lru.move_to_end(key)
+                self.hits += 1
+                return entry
+            if self._db is not None:
+                row = self._db.execute(
+                    "SELECT signs, scores FROM natal WHERE key = ?", (key,)
+                ).fetchone()
+                if row is not None:
+                    entry = {"signs": json.loads(row[0]), "astro_scores": json.loads(row[1])}
+                    self._remember(key, entry)
+                    self.disk_hits += 1
+                    return entry
+            self.misses += 1
+            return None
+
+    def put(self, key, signs, astro_scores):
+        entry = {"signs": dict(signs), "astro_scores": dict(astro_scores)}
+        with self._lock:
+            self._remember(key, entry)
+            if self._db is not None:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO natal (key, signs, scores) VALUES (?, ?, ?)",
+                    (key, json.dumps(entry["signs"]), json.dumps(entry["astro_scores"])),
+                )
+                self._puts += 1
+                if self._puts % self.PRUNE_EVERY == 0:
+                    self._prune()
+                self._db.commit()
+        return entry
+
+    def _prune(self):
+        # INSERT OR REPLACE は行を入れ直すので、rowid が大きいほど最近書いたエントリ
+        self._db.execute(
+            "DELETE FROM natal WHERE rowid NOT IN"
+            " (SELECT rowid FROM natal ORDER BY rowid DESC LIMIT ?)",
+            (self.disk_maxsize,),
+        )
+
+    def _remember(self, key, entry):
+        self._lru[key] = entry
+        self._lru.move_to_end(key)
+        while len(self._lru) > self.maxsize:
+            self._lru.popitem(last=False)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "size": len(self._lru),
+                "maxsize": self.maxsize,
+            }
@@ -0,0 +1,60 @@
+# --- 📄 レポート本文 ---
+# 画面表示・PDF・API で同じ文章を使うため、Streamlit に依存しない形で本文を組み立てる。
+import textwrap
+
+from content import DISLIKE_ANALYSIS, ELEMENT_JP, LIKE_ANALYSIS, OIL_NAMES, STAR_DEFINITIONS
+
+INTRO_TITLE = "【Aroma Soul Navigation 】あなたの「迷いの原因」分析レポート"
+INTRO_TEXT = "「今の心身の状態」と「本来の資質」のズレを分析いたしました。"
+SIGNATURE = "**アロマクオーレ 本多さえこ**"
+
+SECTION_TITLES = {
+    "summary": "#### 1. 分析結果の概要",
+    "star": "#### 2. 本来の資質（星）の解釈：あなたの魂のバランス",
+    "scent": "#### 3. 香りの好みで見える体質",
+    "like": "#### 【好きな香りはあなたを調和させます】",
+}
+
+
+def build_report_texts(core_star_elem, like_scent_elem, dislike_scent_elem):
+    summary = f"""
+    香り反応ワークで特に強い反応が出たのは以下の点でした。
+    
+    * **一番心地よかった香り**（今、心身が必要としているエネルギー）：  
+      **{OIL_NAMES[like_scent_elem]}** ({ELEMENT_JP[like_scent_elem]})
+    
+    * **一番苦手だった香り**（今、心身が拒否・抑圧しているエネルギー）：  
+      **{OIL_NAMES[dislike_scent_elem]}** ({ELEMENT_JP[dislike_scent_elem]})
+    
+    この結果から、あなたの「迷い」の正体が明確に見えてきました。
+    
+    本来のあなたは **【{ELEMENT_JP[core_star_elem]}】** の要素を持っています。  
+    今のあなたの心身の過剰なところを表しているのは **【{ELEMENT_JP[dislike_scent_elem]}】**、  
+    今のあなたが求めていることは **【{ELEMENT_JP[like_scent_elem]}】** です。
+    """
+
+    star_intro = f"まず、あなたが生まれ持った魂のバランス、すなわち【{ELEMENT_JP[core_star_elem]}】が持つ、本来の美点とエネルギーを定義します。"
+
+    # 苦手の分析
+    dislike_text = DISLIKE_ANALYSIS[dislike_scent_elem].replace("[DISLIKE_OIL]", OIL_NAMES[dislike_scent_elem])
+    # 好きの分析
+    like_text = LIKE_ANALYSIS[like_scent_elem].replace("[LIKE_OIL]", OIL_NAMES[like_scent_elem])
+
+    closing = f"""
+    「ズレ」は、決して直すべき欠点ではありません。  
+    むしろ、本来の才能を活かすために必要な「エネルギーの調整」を心身が求めているサインです。
+    
+    好きな香りである **{ELEMENT_JP[like_scent_elem]}** の精油 **【{OIL_NAMES[like_scent_elem]}】** が求めるエネルギーを補い、  
+    苦手な香りである **{ELEMENT_JP[dislike_scent_elem]}** の精油 **【{OIL_NAMES[dislike_scent_elem]}】** が示す過剰なエネルギーを穏やかに整えることで、  
+    あなたが本来お持ちの **【{ELEMENT_JP[core_star_elem]}】** の才能（美点）は、迷いなく輝き始めます。
+    """
+
+    texts = {
+        "summary": summary,
+        "star_intro": star_intro,
+        "star_definition": STAR_DEFINITIONS[core_star_elem],
+        "dislike": dislike_text,
+        "like": like_text,
+        "closing": closing,
+    }
+    return {k: textwrap.dedent(v).strip() for k, v in texts.items()}
@@ -0,0 +1,247 @@
+# --- 📄 PDF レポート ---
+# 画面と同じ内容（Big 3・スコア表・円グラフ・好き/苦手の解説）をサーバー側で PDF にする。
+# 作成はスレッドプールで行い、Streamlit のスクリプトスレッドは待たせない。
+# 出来上がった PDF は分析の入力ごとに LRU で保持し、2回目以降のダウンロードは即座に返す。
+import io
+import re
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from html import escape
+
+from reportlab.graphics.charts.piecharts import Pie
+from reportlab.graphics.shapes import Drawing, String
+from reportlab.lib import colors
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.styles import ParagraphStyle
+from reportlab.lib.units import mm
+from reportlab.pdfbase import pdfmetrics
+from reportlab.pdfbase.cidfonts import UnicodeCIDFont
+from reportlab.platypus import Paragraph, SimpleDocTemplate, Spacer, Table, TableStyle
+
+from content import BIG3_EXPLANATION, COLORS, ELEMENT_JP, ELEMENT_KEYS, SIGN_JP
+from metrics import span
+from report import INTRO_TEXT, INTRO_TITLE, SECTION_TITLES, SIGNATURE, build_report_texts
+
+# 日本語は PDF 閲覧ソフト側のフォントを使う CID フォントで出力する（フォントファイル不要）
+FONT = "HeiseiMin-W3"
+FONT_BOLD = "HeiseiKakuGo-W5"
+pdfmetrics.registerFont(UnicodeCIDFont(FONT))
+pdfmetrics.registerFont(UnicodeCIDFont(FONT_BOLD))
+pdfmetrics.registerFontFamily(FONT, normal=FONT, bold=FONT_BOLD, italic=FONT, boldItalic=FONT_BOLD)
+
+# CID フォントに無い絵文字は落とす
+_EMOJI = re.compile("[\U00010000-\U0010FFFF\u2600-\u27BF\uFE0F\u200D]")
+_BOLD = re.compile(r"\*\*(.+?)\*\*")
+
+STYLES = {
+    "title": ParagraphStyle("title", fontName=FONT_BOLD, fontSize=15, leading=20, spaceAfter=4 * mm, wordWrap="CJK"),
+    "heading": ParagraphStyle("heading", fontName=FONT_BOLD, fontSize=12, leading=16, spaceBefore=4 * mm, spaceAfter=2 * mm, wordWrap="CJK"),
+    "body": ParagraphStyle("body", fontName=FONT, fontSize=9.5, leading=15, spaceAfter=1.5 * mm, wordWrap="CJK"),
+    "bullet": ParagraphStyle("bullet", fontName=FONT, fontSize=9.5, leading=15, leftIndent=5 * mm, bulletIndent=1 * mm, wordWrap="CJK"),
+    "caption": ParagraphStyle("caption", fontName=FONT, fontSize=8, leading=12, textColor=colors.grey, wordWrap="CJK"),
+}
+
+
+def plain(text):
+    return _EMOJI.sub("", text).strip()
+
+
+def _inline(text):
+    return _BOLD.sub(r"<b>\1</b>", escape(plain(text), quote=False))
+
+
+def markdown_flowables(text, style="body"):
+    # レポート本文で使っている範囲の Markdown（見出し・箇条書き・太字・行末2スペースの改行）だけを扱う
+    flowables = []
+    lines = []
+    bullet = False
+
+    def flush():
+        if lines:
+            body = "".join(lines)
+            if bullet:
+                flowables.append(Paragraph(body, STYLES["bullet"], bulletText="•"))
+            else:
+                flowables.append(Paragraph(body, STYLES[style]))
+        lines.clear()
+
+    for raw in text.splitlines():
+        line = raw.strip()
+        if not line:
+            flush()
+            bullet = False
+            continue
+        if line.startswith("#"):
+            flush()
+            bullet = False
+            flowables.append(Paragraph(_inline(line.lstrip("#")), STYLES["heading"]))
+            continue
+        if line.startswith("* "):
+            flush()
+            bullet = True
+            line = line[2:]
+        lines.append(_inline(line) + ("<br/>" if raw.endswith("  ") else ""))
+    flush()
+    return flowables
+
+
+def _pie_drawing(astro_values, scent_values):
+    drawing = Drawing(170 * mm, 68 * mm)
+    for i, (title, values) in enumerate((("星 (先天的)", astro_values), ("香り (現在)", scent_values))):
+        pie = Pie()
+        pie.x = 20 * mm + i * 85 * mm
+        pie.y = 4 * mm
+        pie.width = pie.height = 48 * mm
+        pie.innerRadiusFraction = 0.4
+        # 画面の円グラフ（Plotly の既定）と同じく、値の大きい順に12時の位置から反時計回りに並べる
+        pie.startAngle = 90
+        pie.direction = "anticlockwise"
+        slices = sorted(((v, k) for k, v in zip(ELEMENT_KEYS, values) if v > 0), key=lambda item: -item[0])
+        keys = [k for _, k in slices]
+        data = [v for v, _ in slices]
+        total = float(sum(data)) or 1.0
+        pie.data = data
+        pie.labels = [f"{plain(ELEMENT_JP[k])} {v / total * 100:.0f}%" for k, v in zip(keys, data)]
+        pie.simpleLabels = 1
+        pie.slices.fontName = FONT
+        pie.slices.fontSize = 7
+        pie.slices.strokeColor = colors.white
+        for j, key in enumerate(keys):
+            pie.slices[j].fillColor = colors.HexColor(COLORS[key])
+        drawing.add(pie)
+        drawing.add(String(pie.x + pie.width / 2, 63 * mm, title, fontName=FONT_BOLD,
+                           fontSize=10, textAnchor="middle"))
+    return drawing
+
+
+def render_pdf(analysis):
+    # analysis: name, signs, astro_scores, scent_scores, core / like / dislike のエレメント
+    with span("pdf"):
+        return _render_pdf(analysis)
+
+
+def _render_pdf(analysis):
+    texts = build_report_texts(analysis["core"], analysis["like"], analysis["dislike"])
+    story = [
+        Paragraph(escape(plain(INTRO_TITLE)), STYLES["title"]),
+        Paragraph(escape(f"{analysis['name']} 様"), STYLES["heading"]),
+        Paragraph(escape(INTRO_TEXT), STYLES["body"]),
+    ]
+
+    # --- Big 3 ---
+    big3 = [
+        ("太陽 (本質)", "Sun", "Sun"),
+        ("月 (内面)", "Moon", "Moon"),
+        ("ASC (外見)", "Asc", "Asc"),
+    ]
+    cells = [[
+        [Paragraph(f"<b>{label}</b>", STYLES["body"]),
+         Paragraph(f"<b>{SIGN_JP[analysis['signs'][point]]}</b>", STYLES["heading"]),
+         Paragraph(escape(BIG3_EXPLANATION[expl]), STYLES["caption"])]
+        for label, point, expl in big3
+    ]]
+    big3_table = Table(cells, colWidths=[60 * mm] * 3)
+    big3_table.setStyle(TableStyle([
+        ("BOX", (0, 0), (-1, -1), 0.5, colors.lightgrey),
+        ("VALIGN", (0, 0), (-1, -1), "TOP"),
+    ]))
+    story += [Spacer(1, 2 * mm), big3_table, Spacer(1, 4 * mm)]
+
+    # --- スコアとグラフ ---
+    astro_values = [analysis["astro_scores"][k] for k in ELEMENT_KEYS]
+    scent_values = [analysis["scent_scores"][k] for k in ELEMENT_KEYS]
+    rows = [["性質", "星", "香り(順位計)"]] + [
+        [plain(ELEMENT_JP[k]), str(a), str(s)] for k, a, s in zip(ELEMENT_KEYS, astro_values, scent_values)
+    ]
+    score_table = Table(rows, colWidths=[45 * mm, 20 * mm, 30 * mm])
+    score_table.setStyle(TableStyle([
+        ("FONTNAME", (0, 0), (-1, -1), FONT),
+        ("FONTNAME", (0, 0), (-1, 0), FONT_BOLD),
+        ("FONTSIZE", (0, 0), (-1, -1), 9),
+        ("GRID", (0, 0), (-1, -1), 0.5, colors.lightgrey),
+        ("ALIGN", (1, 1), (-1, -1), "RIGHT"),
+    ]))
+    story += [
+        Paragraph("<b>スコア内訳</b>", STYLES["body"]),
+        score_table,
+        Paragraph("※香り順位計：数字が小さいほど「好き」、大きいほど「苦手」", STYLES["caption"]),
+        _pie_drawing(astro_values, scent_values),
+    ]
+
+    # --- 診断レポート ---
+    story += markdown_flowables(SECTION_TITLES["summary"])
+    story += markdown_flowables(texts["summary"])
+    story += markdown_flowables(SECTION_TITLES["star"])
+    story += markdown_flowables(texts["star_intro"])
+    story += markdown_flowables(texts["star_definition"])
+    story += markdown_flowables(SECTION_TITLES["scent"])
+    story += markdown_flowables(texts["dislike"])
+    story += markdown_flowables(SECTION_TITLES["like"])
+    story += markdown_flowables(texts["like"])
+    story += [Spacer(1, 3 * mm)]
+    story += markdown_flowables(texts["closing"])
+    story += [Spacer(1, 3 * mm)]
+    story += markdown_flowables(SIGNATURE)
+
+    buf = io.BytesIO()
+    doc = SimpleDocTemplate(buf, pagesize=A4, leftMargin=15 * mm, rightMargin=15 * mm,
+                            topMargin=12 * mm, bottomMargin=12 * mm,
+                            title="Aroma Soul Navigation", author="アロマクオーレ")
+    doc.build(story)
+    return buf.getvalue()
+
+
+class RendererBusy(Exception):
+    pass
+
+
+class PdfRenderer:
+    def __init__(self, max_workers=2, max_pending=8, maxsize=128):
+        self.maxsize = maxsize
+        self.max_pending = max_pending
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="pdf")
+        self._lru = OrderedDict()
+        self._pending = {}
+        self._errors = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            pdf = self._lru.get(key)
+            if pdf is not None:
+                self._lru.move_to_end(key)
+            return pdf
+
+    def is_pending(self, key):
+        with self._lock:
+            return key in self._pending
+
+    def error(self, key):
+        with self._lock:
+            return self._errors.get(key)
+
+    def submit(self, key, analysis):
+        # 同じ入力の作成中ジョブがあればそれを返す。待ち行列が一杯なら RendererBusy
+        with self._lock:
+            if key in self._pending:
+                return self._pending[key]
+            if len(self._pending) >= self.max_pending:
+                raise RendererBusy("PDF renderer queue is full")
+            self._errors.pop(key, None)
+            future = self._pool.submit(render_pdf, analysis)
+            self._pending[key] = future
+        future.add_done_callback(lambda f: self._finish(key, f))
+        return future
+
+    def _finish(self, key, future):
+        with self._lock:
+            self._pending.pop(key, None)
+            error = future.exception()
+            if error is not None:
+                self._errors[key] = error
+                return
+            self._lru[key] = future.result()
+            self._lru.move_to_end(key)
+            while len(self._lru) > self.maxsize:
+                self._lru.popitem(last=False)
@@ -0,0 +1,115 @@
+# --- 🌟 診断ロジック（Streamlit 非依存） ---
+# 星のスコア・香りのスコア・好き/苦手/本質のエレメント選択をまとめたもの。
+# import しても副作用はない（天体暦のパス設定は呼び出し側で ephemeris.ensure_ephemeris() を使う）。
+from datetime import datetime
+from zoneinfo import ZoneInfo
+
+from astro import compute_element_scores
+from content import ELEMENTS, SCENTS_CONF
+from gazetteer import resolve_place
+from natal_cache import NatalCache
+
+# 出生時刻は日本の現地時刻として扱う。1948〜1951年の夏時間（+10:00）は tz データベースに従う
+JAPAN_TZ = ZoneInfo("Asia/Tokyo")
+
+# 出生データの範囲（サイドバーの入力欄と同じ。API・グループ・一括処理の入力もこれで確かめる）
+BIRTH_FIELDS = {
+    "year": (1950, 2025),
+    "month": (1, 12),
+    "day": (1, 31),
+    "hour": (0, 23),
+    "minute": (0, 59),
+}
+
+
+def get_element(sign_name):
+    for element, signs in ELEMENTS.items():
+        if sign_name in signs: return element
+    return None
+
+
+def validate_scent_ranks(scent_ranks):
+    # 8本の香りそれぞれに 1〜8 位が1つずつ付いているか
+    keys = [scent["key"] for scent in SCENTS_CONF]
+    missing = [k for k in keys if k not in scent_ranks]
+    if missing:
+        raise ValueError(f"missing scent ranks: {', '.join(missing)}")
+    ranks = sorted(int(scent_ranks[k]) for k in keys)
+    if ranks != list(range(1, len(keys) + 1)):
+        raise ValueError("scent ranks must be a permutation of 1-8")
+
+
+def validate_birth(values):
+    # values: (年, 月, 日, 時, 分)。範囲外や存在しない日付は ValueError
+    for (field, (lo, hi)), value in zip(BIRTH_FIELDS.items(), values):
+        if not lo <= value <= hi:
+            raise ValueError(f"{field} must be between {lo} and {hi}")
+    try:
+        datetime(*values)
+    except ValueError:
+        raise ValueError("invalid birth date/time") from None
+
+
+def utc_offset(dt):
+    minutes = int(dt.utcoffset().total_seconds()) // 60
+    sign = "+" if minutes >= 0 else "-"
+    return f"{sign}{abs(minutes) // 60:02d}:{abs(minutes) % 60:02d}"
+
+
+def natal_key(b_year, b_month, b_day, b_hour, b_min, place):
+    # NatalCache のキー（UTCオフセットは夏時間を含めた実際の値）
+    birth = datetime(b_year, b_month, b_day, b_hour, b_min, tzinfo=JAPAN_TZ)
+    date_str = f"{b_year}/{b_month:02d}/{b_day:02d}"
+    time_str = f"{b_hour:02d}:{b_min:02d}"
+    return NatalCache.make_key(date_str, time_str, utc_offset(birth), place)
+
+
+def compute_natal(b_year, b_month, b_day, b_hour, b_min, place, natal_cache=None):
+    # 星の計算（キャッシュがあれば同じ出生データはキャッシュから返す）
+    # place: 都道府県名、または市区町村の団体コード（gazetteer.resolve_place を参照）
+    birth = datetime(b_year, b_month, b_day, b_hour, b_min, tzinfo=JAPAN_TZ)
+    cache_key = None
+    if natal_cache is not None:
+        cache_key = natal_key(b_year, b_month, b_day, b_hour, b_min, place)
+        natal = natal_cache.get(cache_key)
+        if natal is not None:
+            return natal
+    lat, lon = resolve_place(place)
+    natal = compute_element_scores(birth, lat, lon)
+    if natal_cache is not None:
+        natal = natal_cache.put(cache_key, natal["signs"], natal["astro_scores"])
+    return natal
+
+
+def compute_scent(scent_ranks):
+    # 香りの計算
+    scent_scores = {"Fire": 0, "Earth": 0, "Air": 0, "Water": 0}
+    min_ranks = {"Fire": 9, "Earth": 9, "Air": 9, "Water": 9}
+    max_ranks = {"Fire": 0, "Earth": 0, "Air": 0, "Water": 0}
+
+    for scent in SCENTS_CONF:
+        rank = scent_ranks[scent["key"]]
+        elem = scent["element"]
+        scent_scores[elem] += rank
+        if rank < min_ranks[elem]: min_ranks[elem] = rank
+        if rank > max_ranks[elem]: max_ranks[elem] = rank
+
+    # 同点のときは、好きは最上位の順位が高い方、苦手は最下位の順位が低い方を選ぶ
+    like_scent_elem = min(scent_scores.keys(), key=lambda k: (scent_scores[k], min_ranks[k]))
+    dislike_scent_elem = max(scent_scores.keys(), key=lambda k: (scent_scores[k], -max_ranks[k]))
+    return scent_scores, like_scent_elem, dislike_scent_elem
+
+
+def analyze(birth, scent_ranks, natal_cache=None, natal=None):
+    # birth: (年, 月, 日, 時, 分, 出生地)。natal を渡せば星の計算はしない（chart_service で計算済みのもの）
+    if natal is None:
+        natal = compute_natal(*birth, natal_cache=natal_cache)
+    scent_scores, like_scent_elem, dislike_scent_elem = compute_scent(scent_ranks)
+    return {
+        "signs": natal["signs"],
+        "astro_scores": natal["astro_scores"],
+        "scent_scores": scent_scores,
+        "core": get_element(natal["signs"]["Sun"]),
+        "like": like_scent_elem,
+        "dislike": dislike_scent_elem,
+    }
@@ -0,0 +1,93 @@
+# --- 🌌 星の流れ（トランジット） ---
+# 今の空（10天体）の PLANET_SCORES の重み付きエレメントバランスを、期間内の1日ごと/1時間ごとに求める。
+# ASC・MC は観測地で変わるので入れない（空はどこでも同じなので、全員で計算結果を共有できる）。
+#
+# 1点ずつ swisseph を呼ぶ代わりに、天体ごとに 30日単位のブロックで
+#   半日刻みで黄経を求める → サインが変わった区間だけ二分探索でイングレス時刻を詰める
+# ところまでを行い、ブロックの結果をプロセス全体で LRU キャッシュする。
+# 各時刻のサインは NumPy の searchsorted でまとめて引き、サイン番号 % 4 でエレメントにする。
+from datetime import timedelta
+from functools import lru_cache
+
+import numpy as np
+import swisseph as swe
+
+from astro import ELEMENT_ORDER, PLANET_SCORES, PLANETS, julday_ut, sign_index
+
+BLOCK_DAYS = 30
+# 月でも半日では1サイン（30度）を越えられない。逆行・留で境界を往復しても取りこぼさない刻み
+STEP_DAYS = 0.5
+PRECISION = 1e-6
+# 1回の表示で計算する点の上限（1時間ごとなら約2年分）
+MAX_POINTS = 20_000
+
+
+def _body_sign(body, jd):
+    pos, _ = swe.calc_ut(jd, body, swe.FLG_SWIEPH)
+    return sign_index(pos[0])
+
+
+@lru_cache(maxsize=4096)
+def block_ingresses(body, block):
+    # block 番目の30日（JD で [block*30, block*30+30)）の、ブロック開始時のサインとイングレス
+    start = block * BLOCK_DAYS
+    grid = start + np.arange(int(BLOCK_DAYS / STEP_DAYS) + 1) * STEP_DAYS
+    lons = np.fromiter((swe.calc_ut(jd, body, swe.FLG_SWIEPH)[0][0] for jd in grid), float, len(grid))
+    signs = (lons // 30).astype(np.int64) % 12
+    jds, out = [start], [signs[0]]
+    for i in np.flatnonzero(signs[1:] != signs[:-1]):
+        lo, hi, lo_sign = grid[i], grid[i + 1], out[-1]
+        while hi - lo > PRECISION:
+            mid = (lo + hi) / 2
+            if _body_sign(body, mid) == lo_sign:
+                lo = mid
+            else:
+                hi = mid
+        jds.append(hi)
+        out.append(signs[i + 1])
+    return np.array(jds), np.array(out, dtype=np.int8)
+
+
+def sky_balance(jds):
+    # jds: 世界時 JD の配列 → (件数, 4) の ELEMENT_ORDER 順のスコア
+    jds = np.asarray(jds, dtype=float)
+    scores = np.zeros((len(jds), len(ELEMENT_ORDER)), dtype=np.int16)
+    if not len(jds):
+        return scores
+    blocks = range(int(jds.min() // BLOCK_DAYS), int(jds.max() // BLOCK_DAYS) + 1)
+    rows = np.arange(len(jds))
+    for name, body in PLANETS:
+        tables = [block_ingresses(body, block) for block in blocks]
+        ingress_jds = np.concatenate([t[0] for t in tables])
+        signs = np.concatenate([t[1] for t in tables])
+        elements = signs[np.searchsorted(ingress_jds, jds, side="right") - 1] % 4
+        scores[rows, elements] += PLANET_SCORES[name]
+    return scores
+
+
+def count_points(start, end, step_hours):
+    # start / end: タイムゾーン付きの datetime（end を含む）
+    step = timedelta(hours=step_hours)
+    count = int((end - start) / step) + 1
+    if count > MAX_POINTS:
+        raise ValueError(f"too many points ({count}); at most {MAX_POINTS}")
+    return count
+
+
+def timeline_chunks(start, end, step_hours, chunks=8):
+    # 計算できた分から (時刻の配列, スコアの配列) を順に返す（グラフを少しずつ描くため）
+    # 時刻は現地時刻の datetime64[m]（plotly は datetime のリストより桁違いに速く扱える）
+    count = count_points(start, end, step_hours)
+    start_jd = julday_ut(start)
+    local_start = np.datetime64(start.replace(tzinfo=None), "m")
+    size = max(1, -(-count // chunks))
+    for first in range(0, count, size):
+        index = np.arange(first, min(first + size, count))
+        jds = start_jd + index * (step_hours / 24.0)
+        times = local_start + (index * step_hours * 60).astype("timedelta64[m]")
+        yield times, sky_balance(jds)
+
+
+def cache_stats():
+    info = block_ingresses.cache_info()
+    return {"hits": info.hits, "misses": info.misses, "size": info.currsize, "maxsize": info.maxsize}
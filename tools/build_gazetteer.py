@@ -0,0 +1,53 @@
+# --- 🛠️ 市区町村データ（data/gazetteer.bin）の生成 ---
+# 全国地方公共団体コード・名前・よみがな・役場の緯度経度の JSON から作る。
+# 元データは japancode（MIT License）の japancode/data/municipalities.json:
+#   [{"pref": "北海道", "city": "札幌市 中央区", "citykana": "さっぽろし ちゅうおうく",
+#     "lat": 43.05, "lng": 141.34, "lgcode": "11011"}, ...]
+#   python tools/build_gazetteer.py municipalities.json
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from content import PREFECTURES
+from gazetteer import GAZETTEER_PATH, read_gazetteer, write_gazetteer
+
+
+def load_source(path):
+    with open(path, encoding="utf-8") as f:
+        rows = json.load(f)
+    places = []
+    for row in rows:
+        if row["pref"] not in PREFECTURES:
+            raise ValueError(f"unknown prefecture: {row['pref']}")
+        places.append({
+            # 団体コードは検査数字付きの6桁にそろえる（元データは先頭の0が落ちている）
+            "code": f"{int(row['lgcode']):06d}",
+            "prefecture": row["pref"],
+            "name": row["city"].strip(),
+            "kana": row["citykana"].strip(),
+            "lat": float(row["lat"]),
+            "lon": float(row["lng"]),
+        })
+    places.sort(key=lambda p: p["code"])
+    codes = [p["code"] for p in places]
+    if len(set(codes)) != len(codes):
+        raise ValueError("duplicate municipality codes")
+    return places
+
+
+def main():
+    if len(sys.argv) != 2:
+        raise SystemExit("usage: python tools/build_gazetteer.py municipalities.json")
+    places = load_source(sys.argv[1])
+    os.makedirs(os.path.dirname(GAZETTEER_PATH), exist_ok=True)
+    write_gazetteer(GAZETTEER_PATH, places)
+    # 書き出したものを読み直して確かめる
+    gazetteer = read_gazetteer(GAZETTEER_PATH)
+    assert len(gazetteer) == len(places)
+    print(f"wrote {GAZETTEER_PATH} ({len(places)} places, {os.path.getsize(GAZETTEER_PATH)} bytes)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+# --- 🛠️ イングレス表（data/ingress.bin）の生成 ---
+# 太陽・水星〜冥王星が 1950〜2025年にサインを移動した瞬間（世界時JD）を求めて保存する。
+#   python tools/build_ingress.py [ephemeris ディレクトリ]
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import swisseph as swe
+
+from astro import INGRESS_BODIES, INGRESS_PATH, PLANETS, sign_index, write_ingress
+
+# 逆行・留で境界を往復しても取りこぼさない刻み幅（日）と、移動時刻の精度（日）
+STEP = 0.1
+PRECISION = 1e-9
+
+# 日本時間 1950-01-01 〜 2026-01-01 を前後1日の余裕を持って覆う
+START_JD = swe.julday(1950, 1, 1, 0.0) - 9 / 24.0 - 1.0
+END_JD = swe.julday(2026, 1, 1, 0.0) - 9 / 24.0 + 1.0
+
+
+def body_sign(body, jd):
+    pos, _ = swe.calc_ut(jd, body, swe.FLG_SWIEPH)
+    return sign_index(pos[0])
+
+
+def find_ingress(body, lo, hi, lo_sign):
+    # lo ではまだ lo_sign、hi では別のサイン。境界の直後の時刻を返す
+    while hi - lo > PRECISION:
+        mid = (lo + hi) / 2
+        if body_sign(body, mid) == lo_sign:
+            lo = mid
+        else:
+            hi = mid
+    return hi
+
+
+def build_body(body):
+    sign = body_sign(body, START_JD)
+    jds, signs = [START_JD], [sign]
+    jd = START_JD
+    while jd < END_JD:
+        nxt = min(jd + STEP, END_JD)
+        next_sign = body_sign(body, nxt)
+        if next_sign != sign:
+            jds.append(find_ingress(body, jd, nxt, sign))
+            signs.append(next_sign)
+            sign = next_sign
+        jd = nxt
+    return jds, signs
+
+
+def main():
+    if len(sys.argv) > 1:
+        swe.set_ephe_path(sys.argv[1])
+    else:
+        import flatlib
+        swe.set_ephe_path(flatlib.PATH_RES + "swefiles")
+
+    bodies = dict(PLANETS)
+    tables = {}
+    for name in INGRESS_BODIES:
+        tables[name] = build_body(bodies[name])
+        print(f"{name}: {len(tables[name][0])} entries")
+
+    os.makedirs(os.path.dirname(INGRESS_PATH), exist_ok=True)
+    write_ingress(INGRESS_PATH, START_JD, END_JD, tables)
+    print(f"wrote {INGRESS_PATH} ({os.path.getsize(INGRESS_PATH)} bytes)")
+
+
+if __name__ == "__main__":
+    main()
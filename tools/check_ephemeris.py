@@ -0,0 +1,219 @@
+# --- 🔍 天体暦ダウンロードの動作確認 ---
+# http.server で手元にダウンロード元を立て、ephemeris.provision / ensure_ephemeris が
+# 途中で切れた中身・404・.se1 でない中身を置かずに断ること、同時に呼ばれても1回しか
+# ダウンロードしないこと、offline では通信せずに断ることを確認する。ネットワークは使わない。
+#   python tools/check_ephemeris.py
+import hashlib
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import ephemeris
+from ephemeris import HEADER, EphemerisError, ensure_ephemeris, provision
+
+THREADS = 8
+
+
+def se1_body(seed, size=200_000):
+    rng = random.Random(seed)
+    return HEADER + rng.randbytes(size - len(HEADER))
+
+
+def pinned(files):
+    return {name: (len(body), hashlib.sha256(body).hexdigest()) for name, body in files.items()}
+
+
+class Server:
+    # routes: パス → (ステータス, 中身, Content-Length)。Content-Length が None なら中身の長さ
+    def __init__(self):
+        self.routes = {}
+        self.requests = Counter()
+        self.delay = 0.0
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                server.requests[self.path] += 1
+                time.sleep(server.delay)
+                status, body, length = server.routes.get(self.path, (404, b"not found", None))
+                self.send_response(status)
+                self.send_header("Content-Length", str(len(body) if length is None else length))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.base_url = f"http://127.0.0.1:{self.httpd.server_port}/"
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+
+    def serve(self, files, delay=0.0, **overrides):
+        self.routes = {f"/{name}": (200, body, None) for name, body in files.items()}
+        self.routes.update({f"/{name}": route for name, route in overrides.items()})
+        self.requests.clear()
+        self.delay = delay
+
+
+def leftovers(ephe_dir):
+    return sorted(name for name in os.listdir(ephe_dir) if name.endswith(".part"))
+
+
+def expect_error(server, files, ephe_dir, **overrides):
+    server.serve(files, **overrides)
+    try:
+        provision(ephe_dir, "download", server.base_url)
+    except (EphemerisError, OSError) as e:
+        # requests の例外（404 や途中で切れた転送）は OSError の仲間
+        failed = sorted(name for name in files if not os.path.exists(os.path.join(ephe_dir, name)))
+        if not set(overrides) <= set(failed):
+            return f"a broken file was kept: {sorted(set(overrides) - set(failed))}"
+        if leftovers(ephe_dir):
+            return f"temporary files left: {leftovers(ephe_dir)}"
+        return None if str(e) else "empty error message"
+    return "no error was raised"
+
+
+def case_success(server, files, ephe_dir):
+    server.serve(files)
+    provision(ephe_dir, "download", server.base_url)
+    for name, body in files.items():
+        with open(os.path.join(ephe_dir, name), "rb") as f:
+            if f.read() != body:
+                return f"{name}: content differs"
+    if leftovers(ephe_dir):
+        return f"temporary files left: {leftovers(ephe_dir)}"
+    # 揃っていれば2回目は通信しない
+    server.serve(files)
+    provision(ephe_dir, "download", server.base_url)
+    return f"downloaded again: {dict(server.requests)}" if server.requests else None
+
+
+def case_truncated(server, files, ephe_dir):
+    # 途中で接続が切れる（Content-Length は本来の長さ）
+    name, body = next(iter(files.items()))
+    return expect_error(server, files, ephe_dir, **{name: (200, body[:len(body) // 2], len(body))})
+
+
+def case_truncated_consistent(server, files, ephe_dir):
+    # 途中までの中身を、その長さの Content-Length で返すミラー
+    name, body = next(iter(files.items()))
+    return expect_error(server, files, ephe_dir, **{name: (200, body[:len(body) // 2], None)})
+
+
+def case_oversized(server, files, ephe_dir):
+    name, body = next(iter(files.items()))
+    return expect_error(server, files, ephe_dir, **{name: (200, body + body, None)})
+
+
+def case_not_found(server, files, ephe_dir):
+    name = next(iter(files))
+    return expect_error(server, files, ephe_dir, **{name: (404, b"404: Not Found", None)})
+
+
+def case_html(server, files, ephe_dir):
+    # 200 で返ってくるエラーページ
+    name = next(iter(files))
+    return expect_error(server, files, ephe_dir, **{name: (200, b"<html><body>rate limited</body></html>", None)})
+
+
+def case_same_size(server, files, ephe_dir):
+    # 長さは同じだが中身が違う（別バージョンのファイルなど）
+    name, body = next(iter(files.items()))
+    return expect_error(server, files, ephe_dir, **{name: (200, se1_body("other", len(body)), None)})
+
+
+def case_no_header(server, files, ephe_dir):
+    # sha256 は合っているが .se1 のヘッダが無い（ピン留めした値の誤り）
+    name = next(iter(files))
+    body = b"not an ephemeris" * 1000
+    ephemeris.EPHE_FILES = pinned({**files, name: body})
+    try:
+        return expect_error(server, files, ephe_dir, **{name: (200, body, None)})
+    finally:
+        ephemeris.EPHE_FILES = pinned(files)
+
+
+def case_concurrent(server, files, ephe_dir):
+    server.serve(files, delay=0.2)
+    ephemeris._ready_path = None
+    barrier = threading.Barrier(THREADS)
+    results, errors = [], []
+
+    def call():
+        barrier.wait()
+        try:
+            results.append(ensure_ephemeris(ephe_dir, "download", server.base_url))
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=call) for _ in range(THREADS)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    ephemeris._ready_path = None
+    if errors:
+        return f"{len(errors)} callers failed: {errors[0]!r}"
+    if set(results) != {ephe_dir}:
+        return f"unexpected paths: {set(results)}"
+    counts = {path.lstrip("/"): count for path, count in server.requests.items()}
+    return None if counts == dict.fromkeys(files, 1) else f"requests per file: {counts}"
+
+
+def case_offline(server, files, ephe_dir):
+    server.serve(files)
+    try:
+        provision(ephe_dir, "offline", server.base_url)
+    except EphemerisError:
+        return f"network was used: {dict(server.requests)}" if server.requests else None
+    return "no error was raised"
+
+
+CASES = [
+    ("success", case_success),
+    ("truncated body", case_truncated),
+    ("truncated body with matching Content-Length", case_truncated_consistent),
+    ("oversized body", case_oversized),
+    ("404", case_not_found),
+    ("HTML instead of .se1", case_html),
+    ("same size, different content", case_same_size),
+    ("pinned hash without .se1 header", case_no_header),
+    ("concurrent callers", case_concurrent),
+    ("offline mode", case_offline),
+]
+
+
+def main():
+    # swisseph は set_ephe_path で sepl_18.se1 などを読みに行くので、本物とは別の名前にする
+    files = {f"check_{i}.se1": se1_body(i) for i in range(len(ephemeris.EPHE_FILES))}
+    original = ephemeris.EPHE_FILES
+    ephemeris.EPHE_FILES = pinned(files)
+    server = Server()
+    failures = 0
+    try:
+        for label, case in CASES:
+            with tempfile.TemporaryDirectory() as ephe_dir:
+                try:
+                    problem = case(server, files, ephe_dir)
+                except Exception as e:
+                    problem = f"unexpected {type(e).__name__}: {e}"
+            print(f"{'FAIL' if problem else 'ok  '} {label}" + (f": {problem}" if problem else ""))
+            failures += bool(problem)
+    finally:
+        ephemeris.EPHE_FILES = original
+        server.httpd.shutdown()
+
+    print(f"{len(CASES)} cases checked, {failures} failures")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+# --- 🔍 スコア計算エンジンと flatlib の一致確認 ---
+# 1950〜2025年のランダムな出生データで、astro.compute_element_scores と
+# flatlib の Chart から求めたサイン・スコアが完全に一致するかを確認する。
+#   python tools/verify_engine.py [件数] [ephemeris ディレクトリ]
+import os
+import random
+import sys
+from datetime import datetime, timedelta, timezone
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import flatlib
+import swisseph as swe
+from flatlib import const
+from flatlib.chart import Chart
+from flatlib.datetime import Datetime
+from flatlib.geopos import GeoPos
+
+from astro import PLANET_SCORES, compute_element_scores
+
+FLATLIB_IDS = {
+    "Sun": const.SUN, "Moon": const.MOON, "Mercury": const.MERCURY,
+    "Venus": const.VENUS, "Mars": const.MARS, "Jupiter": const.JUPITER,
+    "Saturn": const.SATURN, "Uranus": const.URANUS, "Neptune": const.NEPTUNE,
+    "Pluto": const.PLUTO, "Asc": const.ASC, "Mc": const.MC
+}
+
+ELEMENTS = {
+    "Fire": ["Aries", "Leo", "Sagittarius"],
+    "Earth": ["Taurus", "Virgo", "Capricorn"],
+    "Air": ["Gemini", "Libra", "Aquarius"],
+    "Water": ["Cancer", "Scorpio", "Pisces"]
+}
+
+
+def flatlib_natal(birth, lat, lon):
+    date = Datetime(birth.strftime("%Y/%m/%d"), birth.strftime("%H:%M"), "+09:00")
+    chart = Chart(date, GeoPos(lat, lon), IDs=const.LIST_OBJECTS)
+    signs = {name: chart.get(body_id).sign for name, body_id in FLATLIB_IDS.items()}
+    scores = {"Fire": 0, "Earth": 0, "Air": 0, "Water": 0}
+    for name, sign in signs.items():
+        for element, element_signs in ELEMENTS.items():
+            if sign in element_signs:
+                scores[element] += PLANET_SCORES[name]
+    return {"signs": signs, "astro_scores": scores}
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    ephe_path = sys.argv[2] if len(sys.argv) > 2 else flatlib.PATH_RES + "swefiles"
+    swe.set_ephe_path(ephe_path)
+
+    rng = random.Random(20240101)
+    jst = timezone(timedelta(hours=9))
+    start = datetime(1950, 1, 1, tzinfo=jst)
+    span_minutes = int((datetime(2026, 1, 1, tzinfo=jst) - start).total_seconds() // 60)
+
+    mismatches = 0
+    for _ in range(count):
+        birth = start + timedelta(minutes=rng.randrange(span_minutes))
+        lat = round(rng.uniform(24.0, 45.5), 2)
+        lon = round(rng.uniform(123.0, 146.0), 2)
+        expected = flatlib_natal(birth, lat, lon)
+        actual = compute_element_scores(birth, lat, lon)
+        if actual != expected:
+            mismatches += 1
+            print(f"MISMATCH {birth.isoformat()} ({lat}, {lon})")
+            print(f"  flatlib: {expected}")
+            print(f"  engine : {actual}")
+
+    print(f"{count} charts checked, {mismatches} mismatches")
+    sys.exit(1 if mismatches else 0)
+
+
+if __name__ == "__main__":
+    main()